@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+DOCUMENTATION = """
+---
+name: api_cost
+type: aggregate
+short_description: Report the Confluent Cloud API cost of every task and play
+description:
+  - Times every C(confluent.cloud.*) task on every host, and aggregates the results by module and by target
+    resource (the I(id), I(ids), I(name), I(names) or I(environments) the task was given).
+  - At the end of each play prints the total Confluent time, the slowest tasks and the lookups that were
+    repeated with the same arguments, the candidates for batching, I(api_coalesce) or I(api_cache).
+  - Tasks run with I(api_stats=true), e.g. through C(CONFLUENT_API_STATS=true), also report their API calls,
+    requests, retries and time spent in backoff or waiting on the rate limiter.
+  - Task times are wall times measured on the controller, they include the module transfer and startup.
+version_added: "0.0.1"
+author: "Keith Resar (@keithresar)"
+requirements:
+  - Enable the callback with C(callbacks_enabled = confluent.cloud.api_cost) in ansible.cfg
+options:
+  report_path:
+    description: Also write the report of the whole playbook to this file, as JSON.
+    type: path
+    env:
+      - name: CONFLUENT_COST_REPORT
+    ini:
+      - section: callback_confluent_api_cost
+        key: report_path
+  top:
+    description: Number of slowest tasks and repeated lookups to print per play.
+    type: int
+    default: 10
+    env:
+      - name: CONFLUENT_COST_TOP
+    ini:
+      - section: callback_confluent_api_cost
+        key: top
+"""
+
+EXAMPLES = """
+# ansible.cfg
+# [defaults]
+# callbacks_enabled = confluent.cloud.api_cost
+#
+# [callback_confluent_api_cost]
+# report_path = ./confluent-cost.json
+
+# or for a single run
+# ANSIBLE_CALLBACKS_ENABLED=confluent.cloud.api_cost CONFLUENT_API_STATS=true ansible-playbook site.yml
+"""
+
+import json
+import time
+
+from ansible.module_utils._text import to_text
+from ansible.plugins.callback import CallbackBase
+
+COLLECTION = "confluent.cloud."
+
+# Task arguments that name the target resource, in order of preference
+RESOURCE_KEYS = ("id", "ids", "name", "names", "environments", "path")
+
+# Task arguments left out when comparing lookups, besides the api_*
+# connection and tuning options
+IGNORED_KEYS = ("validate_certs",)
+
+# api_stats totals summed per module, resource and play
+STATS_KEYS = ("calls", "requests", "retries", "cache_hits", "coalesced", "latency", "backoff_time", "rate_limit_wait")
+
+
+def task_module(task):
+    # Short module name of a confluent.cloud task, None for other tasks
+    action = getattr(task, "resolved_action", None) or task.action
+    if not action or not action.startswith(COLLECTION):
+        return(None)
+    return(action[len(COLLECTION):])
+
+
+def task_resource(args):
+    for key in RESOURCE_KEYS:
+        value = args.get(key)
+        if value:
+            if isinstance(value, (list, tuple)):
+                value = ",".join(to_text(v) for v in value)
+            return("%s=%s" % (key, value))
+    return("*")
+
+
+def task_lookup(module, args):
+    # Comparable form of a task's arguments
+    args = dict((k, v) for k, v in args.items()
+                if v is not None and k not in IGNORED_KEYS and not k.startswith(("_", "api_")))
+    return("%s %s" % (module, json.dumps(args, sort_keys=True, default=to_text)))
+
+
+def aggregate(totals, entry):
+    totals["tasks"] = totals.get("tasks", 0) + 1
+    totals["time"] = totals.get("time", 0.0) + entry["duration"]
+    for key in STATS_KEYS:
+        if key in entry:
+            totals[key] = totals.get(key, 0) + entry[key]
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "aggregate"
+    CALLBACK_NAME = "confluent.cloud.api_cost"
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, *args, **kwargs):
+        super(CallbackModule, self).__init__(*args, **kwargs)
+        self.plays = []
+        self.play = None
+        self.started = dict()
+
+    def v2_playbook_on_play_start(self, play):
+        self.play_end()
+        self.play = dict(name=play.get_name().strip(), entries=[])
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        # Fallback start time on versions without v2_runner_on_start,
+        # dropped with the first host result that had its own, or at the
+        # end of the play
+        if task_module(task) is not None:
+            self.started[task._uuid] = time.time()
+
+    def task_started(self, host, task):
+        # Start time of the task on host, forgotten once its result is in
+        started = self.started.pop((host, task._uuid), None)
+        if started is not None:
+            self.started.pop(task._uuid, None)
+            return(started)
+        return(self.started.get(task._uuid))
+
+    def v2_runner_on_start(self, host, task):
+        if task_module(task) is not None:
+            self.started[(host.get_name(), task._uuid)] = time.time()
+
+    def v2_runner_on_ok(self, result):
+        self.record(result, "ok")
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self.record(result, "failed")
+
+    def v2_runner_on_unreachable(self, result):
+        self.record(result, "unreachable")
+
+    def v2_runner_on_skipped(self, result):
+        # Skipped tasks cost nothing
+        self.task_started(result._host.get_name(), result._task)
+
+    def record(self, result, status):
+        task = result._task
+        host = result._host.get_name()
+        started = self.task_started(host, task) or time.time()
+        module = task_module(task)
+        if module is None or self.play is None:
+            return
+
+        # Loops report one result per item
+        items = result._result.get("results")
+        if not isinstance(items, list):
+            items = [result._result]
+
+        entry = dict(
+            task=task.get_name().strip(),
+            host=host,
+            module=module,
+            status=status,
+            duration=time.time() - started,
+            lookups=[],
+        )
+        resources = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            args = item.get("invocation", {}).get("module_args") or task.args
+            resources.append(task_resource(args))
+            if status == "ok" and not item.get("changed"):
+                entry["lookups"].append(task_lookup(module, args))
+            for key in STATS_KEYS:
+                if key in item.get("api_stats", {}):
+                    entry[key] = entry.get(key, 0) + item["api_stats"][key]
+        entry["resource"] = ";".join(sorted(set(resources))) or "*"
+        self.play["entries"].append(entry)
+
+    def play_end(self):
+        if self.play is None:
+            return
+        report = self.report(self.play)
+        self.plays.append(report)
+        self.play = None
+        self.started = dict()
+        if report["tasks"]:
+            self.display(report)
+
+    def report(self, play):
+        entries = play["entries"]
+        report = dict(name=play["name"], tasks=len(entries), time=sum(e["duration"] for e in entries))
+        report["by_module"] = dict()
+        report["by_resource"] = dict()
+        for entry in entries:
+            aggregate(report["by_module"].setdefault(entry["module"], dict()), entry)
+            aggregate(report["by_resource"].setdefault("%s %s" % (entry["module"], entry["resource"]), dict()), entry)
+
+        report["slowest"] = [dict((k, v) for k, v in e.items() if k != "lookups")
+                             for e in sorted(entries, key=lambda e: e["duration"], reverse=True)]
+
+        # Lookups made more than once with the same arguments, across
+        # tasks and hosts
+        lookups = dict()
+        for entry in entries:
+            for lookup in entry["lookups"]:
+                seen = lookups.setdefault(lookup, dict(lookup=lookup, count=0, time=0.0, tasks=[], hosts=[]))
+                seen["count"] += 1
+                seen["time"] += entry["duration"] / len(entry["lookups"])
+                if entry["task"] not in seen["tasks"]:
+                    seen["tasks"].append(entry["task"])
+                if entry["host"] not in seen["hosts"]:
+                    seen["hosts"].append(entry["host"])
+        report["repeated"] = sorted((s for s in lookups.values() if s["count"] > 1), key=lambda s: s["time"], reverse=True)
+        return(report)
+
+    def display(self, report):
+        top = self.get_option("top")
+        self._display.banner("CONFLUENT API COST [%s]" % report["name"])
+        self._display.display("%d tasks, %.2fs in Confluent tasks" % (report["tasks"], report["time"]))
+
+        self._display.display("\nBy module:")
+        for module, totals in sorted(report["by_module"].items(), key=lambda m: m[1]["time"], reverse=True):
+            self._display.display("  %-40s %s" % (module, self.format_totals(totals)))
+
+        self._display.display("\nBy resource:")
+        for resource, totals in sorted(report["by_resource"].items(), key=lambda r: r[1]["time"], reverse=True)[:top]:
+            self._display.display("  %-40s %s" % (resource, self.format_totals(totals)))
+
+        self._display.display("\nSlowest tasks:")
+        for entry in report["slowest"][:top]:
+            self._display.display("  %7.2fs  %s (%s) on %s" % (entry["duration"], entry["task"], entry["resource"], entry["host"]))
+
+        if report["repeated"]:
+            self._display.display("\nRepeated lookups:")
+            for seen in report["repeated"][:top]:
+                self._display.display("  %dx %.2fs  %s, in %s on %d host(s)" % (
+                    seen["count"], seen["time"], seen["lookup"], ", ".join(seen["tasks"]), len(seen["hosts"])))
+
+    def format_totals(self, totals):
+        line = "%3d tasks %7.2fs" % (totals["tasks"], totals["time"])
+        for key in STATS_KEYS:
+            if totals.get(key):
+                value = totals[key]
+                line += (" %s=%.2fs" % (key, value)) if isinstance(value, float) else (" %s=%d" % (key, value))
+        return(line)
+
+    def v2_playbook_on_stats(self, stats):
+        self.play_end()
+        path = self.get_option("report_path")
+        if not path:
+            return
+
+        total = dict(tasks=0, time=0.0)
+        for play in self.plays:
+            total["tasks"] += play["tasks"]
+            total["time"] += play["time"]
+        try:
+            with open(path, "w") as f:
+                json.dump(dict(plays=self.plays, total=total), f, indent=2, sort_keys=True, default=to_text)
+        except (IOError, OSError) as e:
+            self._display.warning("Unable to write the Confluent API cost report to %s: %s" % (path, to_text(e)))
@@ -10,25 +10,52 @@ class ModuleDocFragment(object):
     DOCUMENTATION = r'''
     options:
         api_key:
-          description: Confluent Cloud API Key
+          description:
+            - Confluent Cloud API Key
+            - Required unless the task runs over the C(confluent.cloud.confluent) httpapi connection.
           type: str
-          required: true
         api_secret:
-          description: Confluent Cloud API Secret
+          description:
+            - Confluent Cloud API Secret
+            - Required unless the task runs over the C(confluent.cloud.confluent) httpapi connection.
           type: str
-          required: true
         api_timeout:
           description: Timeout used for the API requests.
           type: int
           default: 60
         api_retries:
-          description: Amount of max retries for the API requests.
+          description:
+            - Amount of max attempts for the API requests.
+            - 429 responses are always retried. 500, 502, 503, 504 and connection errors are retried for everything but C(POST).
           type: int
           default: 5
+        api_retry_budget:
+          description:
+            - Total seconds the task may spend retrying failed requests, across all of its requests.
+            - Once used up, failed requests are not retried any more and backoff sleeps are cut short.
+          type: int
+          default: 120
+        api_circuit_breaker_threshold:
+          description:
+            - After this many consecutive failed attempts (5xx or connection errors) further requests fail
+              immediately without being sent.
+            - Every I(api_retry_max_delay) seconds a single request is sent to probe the API, once one succeeds
+              requests are sent again.
+            - C(0) disables the circuit breaker.
+          type: int
+          default: 10
         api_retry_max_delay:
-          description: Exponential backoff delay in seconds between retries up to this max delay value.
+          description:
+            - Exponential backoff delay in seconds between retries up to this max delay value.
+            - A C(Retry-After) or rate limit reset sent by the API takes precedence.
           type: int
           default: 12
+        api_page_size:
+          description:
+            - Number of resources requested per page when listing collections.
+            - Confluent Cloud caps this at 100.
+          type: int
+          default: 100
         api_endpoint:
           description: Endpoint used for the API requests.
           type: str
@@ -37,4 +64,85 @@ class ModuleDocFragment(object):
           description: Whether to vaidate API endpoint TLS certs
           type: bool
           default: True
+        api_rate_limit:
+          description:
+            - Maximum requests per second to send, shared by every fork using the same I(api_rate_limit_file).
+            - Requests are paced client-side before the API starts answering with 429 Too Many Requests.
+            - Server provided C(Retry-After) and rate limit reset headers pause all forks until the reset.
+            - C(0) disables client-side pacing.
+          type: float
+          default: 0
+        api_rate_limit_file:
+          description:
+            - State file used to share the rate limiter between forks.
+            - Defaults to a file in the system temporary directory, derived from the API credentials.
+          type: path
+        api_concurrency:
+          description: Maximum number of API requests a module sends in parallel when it fans out.
+          type: int
+          default: 4
+        api_concurrency_adaptive:
+          description:
+            - Halve the parallelism whenever the API throttles a request, then grow it back gradually.
+          type: bool
+          default: True
+        api_stats:
+          description:
+            - Return an C(api_stats) summary of the API calls made by the task.
+            - It covers request and retry counts, status codes, time on the wire, bytes received, time spent in backoff
+              or waiting on the rate limiter, cache hits, coalesced requests, connections opened and handshakes avoided.
+            - Independently of this option, every call is appended as a JSON line to the file named by the
+              C(CONFLUENT_API_TRACE) environment variable when it is set.
+          type: bool
+          default: False
+        api_profile:
+          description:
+            - Directory to write profiling reports of the task to, profiling is off when unset.
+            - The module run is profiled with cProfile from the first API client it creates. The statistics are
+              written as a C(.pstats) file, to be read with the C(pstats) module or tools like snakeviz.
+            - The result then carries a C(profile) summary with the wall time, the hottest functions by own time
+              and the report paths.
+            - The directory is on the host the module runs on, use C(delegate_to) or the local connection to
+              keep the reports on the controller.
+          type: path
+        api_profile_memory:
+          description:
+            - With I(api_profile), also trace memory allocations with tracemalloc.
+            - The top allocation sites are written to a C(.memory.txt) file and the peak traced memory is added
+              to the C(profile) summary. Tracing slows the module down noticeably.
+          type: bool
+          default: False
+        api_coalesce:
+          description:
+            - Coalesce identical GET requests made at the same time by different forks, e.g. the same lookup
+              running for many hosts.
+            - The first fork sends the request and shares a successful response through a lock file in a
+              private per-user directory under the temporary directory, the others wait for it instead of calling
+              the API. Coalescing is skipped when that directory is not owned by the user or is accessible to others.
+            - Only responses published after a fork asked are reused, nothing is served stale. Shared responses are
+              removed after a few seconds.
+            - Combines with I(api_cache), cache misses and revalidations of expired entries are coalesced as well.
+          type: bool
+          default: False
+        api_cache:
+          description:
+            - Cache successful GET responses on disk and reuse them across tasks.
+            - Expired entries are revalidated with If-None-Match/If-Modified-Since when possible.
+            - Creates, updates and deletes invalidate the cached entries of the affected collection.
+          type: bool
+          default: False
+        api_cache_dir:
+          description:
+            - Directory holding cached responses.
+            - Writes invalidate entries here whenever the directory exists, even if I(api_cache) is off.
+          type: path
+          default: ~/.ansible/tmp/confluent_cache
+        api_cache_ttl:
+          description: Seconds a cached response is served without asking the API.
+          type: int
+          default: 60
+        api_cache_max_entries:
+          description: Maximum number of cached responses, least recently used entries are evicted first.
+          type: int
+          default: 512
     '''
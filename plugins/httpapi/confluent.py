@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+DOCUMENTATION = """
+---
+author: "Keith Resar (@keithresar)"
+name: confluent
+short_description: HttpApi plugin for the Confluent Cloud API
+description:
+  - Keeps one authenticated keep-alive HTTPS session to the Confluent Cloud API in the persistent
+    connection daemon, so every C(confluent.cloud) task of a play reuses it instead of connecting again.
+  - Use with C(ansible_connection=ansible.netcommon.httpapi), C(ansible_network_os=confluent.cloud.confluent),
+    C(ansible_host=api.confluent.cloud) and C(ansible_httpapi_use_ssl=true).
+  - The API key and secret are taken from C(ansible_user) and C(ansible_httpapi_password),
+    modules then do not need I(api_key) and I(api_secret).
+version_added: "0.0.1"
+"""
+
+import base64
+
+from ansible.module_utils._text import to_text
+from ansible.plugins.httpapi import HttpApiBase
+
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import ConfluentSession
+
+
+class HttpApi(HttpApiBase):
+
+    def __init__(self, connection):
+        super(HttpApi, self).__init__(connection)
+        self.auth_header = None
+        self.session = None
+
+    def login(self, username, password):
+        # Confluent Cloud uses basic auth on every request, there is no token
+        # to fetch
+        if username and password:
+            auth = "%s:%s" % (username, password)
+            self.auth_header = "Basic %s" % (base64.standard_b64encode(auth.encode()).decode())
+
+    def logout(self):
+        if self.session:
+            self.session.close()
+            self.session = None
+
+    def update_auth(self, response, response_text):
+        return(None)
+
+    def get_session(self):
+        # The daemon outlives the tasks, so the pool and its warm connections
+        # are shared by every task of the play
+        if not self.session:
+            self.session = ConfluentSession(
+                validate_certs=self.connection.get_option("validate_certs"),
+                timeout=self.connection.get_option("persistent_command_timeout"),
+            )
+        return(self.session)
+
+    def send_request(self, data, path, method="GET", headers=None):
+        # The connection sets its URL and calls login() when it connects,
+        # which it only does by itself for connection.send()
+        self.connection._connect()
+
+        headers = dict(headers or {})
+        if self.auth_header and "Authorization" not in headers:
+            headers["Authorization"] = self.auth_header
+
+        session = self.get_session()
+        reused = session.handshakes_avoided
+        body, info = session.request(self.connection._url + path, method=method, data=data, headers=headers)
+
+        return(dict(
+            body=to_text(body, errors="surrogate_or_strict"),
+            info=info,
+            reused=session.handshakes_avoided > reused,
+        ))
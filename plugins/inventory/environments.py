@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+DOCUMENTATION = """
+---
+name: environments
+short_description: Confluent Cloud environments inventory source
+description:
+  - Adds every Confluent Cloud environment as a host, keyed by environment id.
+  - Each environment is placed in C(confluent_environments) and in a group named after its display name.
+  - Use I(keyed_groups), I(groups) and I(compose) to group by metadata or any other attribute.
+  - With I(cache=true) repeated runs are served from the inventory cache until I(cache_timeout) expires.
+  - The configuration file name must end with C(confluent.yml) or C(confluent.yaml).
+version_added: "0.0.1"
+author: "Keith Resar (@keithresar)"
+extends_documentation_fragment:
+  - constructed
+  - inventory_cache
+options:
+  plugin:
+    description: Token that ensures this is a source file for this plugin.
+    required: true
+    choices:
+      - confluent.cloud.environments
+  api_key:
+    description: Confluent Cloud API Key
+    type: str
+    env:
+      - name: CONFLUENT_API_KEY
+  api_secret:
+    description: Confluent Cloud API Secret
+    type: str
+    env:
+      - name: CONFLUENT_API_SECRET
+  api_endpoint:
+    description: Endpoint used for the API requests.
+    type: str
+    default: https://api.confluent.cloud
+    env:
+      - name: CONFLUENT_API_ENDPOINT
+  api_timeout:
+    description: Timeout used for the API requests.
+    type: int
+    default: 60
+    env:
+      - name: CONFLUENT_API_TIMEOUT
+  validate_certs:
+    description: Whether to vaidate API endpoint TLS certs
+    type: bool
+    default: true
+  hostnames:
+    description: Environment attribute used as inventory hostname.
+    type: str
+    default: id
+    choices:
+      - id
+      - display_name
+"""
+
+EXAMPLES = """
+# confluent.yml
+plugin: confluent.cloud.environments
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.ansible/tmp/confluent_inventory
+cache_timeout: 3600
+keyed_groups:
+  - key: confluent_metadata.created_at[:4]
+    prefix: created
+"""
+
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import AnsibleConfluent
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_cache import confluent_cache
+from ansible_collections.confluent.cloud.plugins.plugin_utils.confluent import ConfluentPluginModule
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+    NAME = "confluent.cloud.environments"
+
+    def verify_file(self, path):
+        if super(InventoryModule, self).verify_file(path):
+            return(path.endswith(("confluent.yml", "confluent.yaml")))
+        return(False)
+
+    def get_environments(self):
+        module = ConfluentPluginModule(dict(
+            api_key=self.get_option("api_key"),
+            api_secret=self.get_option("api_secret"),
+            api_endpoint=self.get_option("api_endpoint"),
+            api_timeout=self.get_option("api_timeout"),
+            validate_certs=self.get_option("validate_certs"),
+        ))
+        confluent = AnsibleConfluent(
+            module=module,
+            resource_path="/org/v2/environments",
+            cache=confluent_cache(module),
+        )
+
+        # Workers are forked from this process, leave no keep-alive
+        # connection behind for them to inherit
+        try:
+            return(list(confluent.query()))
+        finally:
+            confluent.session.close()
+
+    def populate(self, environments):
+        strict = self.get_option("strict")
+
+        self.inventory.add_group("confluent_environments")
+        for environment in environments:
+            host = environment[self.get_option("hostnames")]
+            self.inventory.add_host(host, group="confluent_environments")
+
+            name_group = self._sanitize_group_name(environment["display_name"])
+            self.inventory.add_group(name_group)
+            self.inventory.add_child(name_group, host)
+
+            hostvars = dict(
+                confluent_id=environment["id"],
+                confluent_display_name=environment["display_name"],
+                confluent_metadata=environment.get("metadata", {}),
+            )
+            for key, value in hostvars.items():
+                self.inventory.set_variable(host, key, value)
+
+            self._set_composite_vars(self.get_option("compose"), hostvars, host, strict=strict)
+            self._add_host_to_composed_groups(self.get_option("groups"), hostvars, host, strict=strict)
+            self._add_host_to_keyed_groups(self.get_option("keyed_groups"), hostvars, host, strict=strict)
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path)
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        use_cache = self.get_option("cache") and cache
+        update_cache = self.get_option("cache") and not cache
+
+        environments = None
+        if use_cache:
+            try:
+                environments = self._cache[cache_key]
+            except KeyError:
+                update_cache = True
+
+        if environments is None:
+            environments = self.get_environments()
+
+        if update_cache:
+            self._cache[cache_key] = environments
+
+        self.populate(environments)
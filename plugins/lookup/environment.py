@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+DOCUMENTATION = """
+---
+name: environment
+short_description: Resolve Confluent Cloud environment names to ids
+description:
+  - Returns the id of each environment whose display name exactly matches a term.
+  - Environments are listed once per process and credential set, later lookups are answered from memory.
+  - Combine with C(CONFLUENT_API_CACHE) to also share the listing between forks.
+version_added: "0.0.1"
+author: "Keith Resar (@keithresar)"
+options:
+  _terms:
+    description: Environment names to resolve.
+    required: true
+    type: list
+    elements: str
+  api_key:
+    description: Confluent Cloud API Key
+    type: str
+    env:
+      - name: CONFLUENT_API_KEY
+  api_secret:
+    description: Confluent Cloud API Secret
+    type: str
+    env:
+      - name: CONFLUENT_API_SECRET
+  api_endpoint:
+    description: Endpoint used for the API requests.
+    type: str
+    default: https://api.confluent.cloud
+    env:
+      - name: CONFLUENT_API_ENDPOINT
+  api_timeout:
+    description: Timeout used for the API requests.
+    type: int
+    default: 60
+    env:
+      - name: CONFLUENT_API_TIMEOUT
+  validate_certs:
+    description: Whether to vaidate API endpoint TLS certs
+    type: bool
+    default: true
+"""
+
+EXAMPLES = """
+- name: Use the id of the Production environment
+  ansible.builtin.debug:
+    msg: "{{ lookup('confluent.cloud.environment', 'Production') }}"
+- name: Resolve several names at once, one API listing in total
+  ansible.builtin.set_fact:
+    env_ids: "{{ query('confluent.cloud.environment', 'Test', 'Production') }}"
+"""
+
+RETURN = """
+_raw:
+  description: Environment ids, in the order of the terms
+  type: list
+  elements: str
+"""
+
+import hashlib
+
+from ansible.errors import AnsibleError
+from ansible.plugins.lookup import LookupBase
+
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import AnsibleConfluent
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_cache import confluent_cache
+from ansible_collections.confluent.cloud.plugins.plugin_utils.confluent import ConfluentPluginModule
+
+# name -> id index per (endpoint, credential hash), for the life of the process
+_INDEXES = dict()
+
+
+class LookupModule(LookupBase):
+
+    def get_index(self, module):
+        key = (
+            module.params["api_endpoint"],
+            hashlib.sha256(("%s:%s" % (module.params["api_key"], module.params["api_secret"])).encode()).hexdigest(),
+        )
+        if key not in _INDEXES:
+            confluent = AnsibleConfluent(
+                module=module,
+                resource_path="/org/v2/environments",
+                cache=confluent_cache(module),
+            )
+
+            # Lookups may run in the controller process too, leave no
+            # keep-alive connection behind for the forks to inherit
+            index = dict()
+            try:
+                for environment in confluent.query():
+                    index.setdefault(environment["display_name"], environment["id"])
+            finally:
+                confluent.session.close()
+            _INDEXES[key] = index
+
+        return(_INDEXES[key])
+
+    def run(self, terms, variables=None, **kwargs):
+        self.set_options(var_options=variables, direct=kwargs)
+
+        module = ConfluentPluginModule(dict(
+            api_key=self.get_option("api_key"),
+            api_secret=self.get_option("api_secret"),
+            api_endpoint=self.get_option("api_endpoint"),
+            api_timeout=self.get_option("api_timeout"),
+            validate_certs=self.get_option("validate_certs"),
+        ))
+        index = self.get_index(module)
+
+        ids = []
+        for term in terms:
+            if term not in index:
+                raise AnsibleError("No Confluent Cloud environment named %s" % term)
+            ids.append(index[term])
+
+        return(ids)
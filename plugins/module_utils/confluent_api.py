@@ -6,18 +6,45 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
-import re
+import os
+import ssl
+import stat
+import copy
+import json
+import zlib
+import codecs
 import random
+import socket
+import hashlib
+import tempfile
+import threading
 import time
 import base64
-import urllib
+from email.utils import mktime_tz, parsedate_tz
 
 from ansible.module_utils._text import to_native, to_text
 from ansible.module_utils.basic import env_fallback
-from ansible.module_utils.urls import fetch_url
+from ansible.module_utils.six.moves import http_client
+from ansible.module_utils.six.moves.urllib.parse import unquote, urlencode, urlparse
+
+# Only needed on some code paths, so imported where used to keep module
+# startup short: urllib.request (proxy settings), fcntl (shared rate limiter)
+# and ansible.module_utils.connection (httpapi connection).
 
 CONFLUENT_USER_AGENT = "Ansible Confluent Cloud v1"
 
+# One connection pool per module run, shared by every AnsibleConfluent
+_SESSIONS = dict()
+
+# One rate limiter per state file
+_LIMITERS = dict()
+
+# Per-request instrumentation for the module run, see confluent_stats()
+_STATS = None
+
+# Transient server side failures worth another attempt
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
 
 def confluent_argument_spec():
     return dict(
@@ -29,14 +56,12 @@ def confluent_argument_spec():
         api_key=dict(
             type="str",
             fallback=(env_fallback, ["CONFLUENT_API_KEY"]),
-            required=True,
             no_log=False,
         ),
         api_secret=dict(
             type="str",
             fallback=(env_fallback, ["CONFLUENT_API_SECRET"]),
             no_log=True,
-            required=True,
         ),
         api_timeout=dict(
             type="int",
@@ -49,19 +74,1014 @@ def confluent_argument_spec():
             fallback=(env_fallback, ["CONFLUENT_API_RETRY_MAX_DELAY"]),
             default=12,
         ),
+        api_retry_budget=dict(
+            type="int",
+            fallback=(env_fallback, ["CONFLUENT_API_RETRY_BUDGET"]),
+            default=120,
+        ),
+        api_circuit_breaker_threshold=dict(
+            type="int",
+            fallback=(env_fallback, ["CONFLUENT_API_CIRCUIT_BREAKER_THRESHOLD"]),
+            default=10,
+        ),
+        api_page_size=dict(
+            type="int",
+            fallback=(env_fallback, ["CONFLUENT_API_PAGE_SIZE"]),
+            default=100,
+        ),
         validate_certs=dict(
             type="bool",
             default=True,
         ),
+        api_rate_limit=dict(
+            type="float",
+            fallback=(env_fallback, ["CONFLUENT_API_RATE_LIMIT"]),
+            default=0,
+        ),
+        api_rate_limit_file=dict(
+            type="path",
+            fallback=(env_fallback, ["CONFLUENT_API_RATE_LIMIT_FILE"]),
+        ),
+        api_concurrency=dict(
+            type="int",
+            fallback=(env_fallback, ["CONFLUENT_API_CONCURRENCY"]),
+            default=4,
+        ),
+        api_concurrency_adaptive=dict(
+            type="bool",
+            fallback=(env_fallback, ["CONFLUENT_API_CONCURRENCY_ADAPTIVE"]),
+            default=True,
+        ),
+        api_stats=dict(
+            type="bool",
+            fallback=(env_fallback, ["CONFLUENT_API_STATS"]),
+            default=False,
+        ),
+        api_profile=dict(
+            type="path",
+            fallback=(env_fallback, ["CONFLUENT_API_PROFILE"]),
+        ),
+        api_profile_memory=dict(
+            type="bool",
+            fallback=(env_fallback, ["CONFLUENT_API_PROFILE_MEMORY"]),
+            default=False,
+        ),
+        api_coalesce=dict(
+            type="bool",
+            fallback=(env_fallback, ["CONFLUENT_API_COALESCE"]),
+            default=False,
+        ),
+        api_cache=dict(
+            type="bool",
+            fallback=(env_fallback, ["CONFLUENT_API_CACHE"]),
+            default=False,
+        ),
+        api_cache_dir=dict(
+            type="path",
+            fallback=(env_fallback, ["CONFLUENT_API_CACHE_DIR"]),
+            default="~/.ansible/tmp/confluent_cache",
+        ),
+        api_cache_ttl=dict(
+            type="int",
+            fallback=(env_fallback, ["CONFLUENT_API_CACHE_TTL"]),
+            default=60,
+        ),
+        api_cache_max_entries=dict(
+            type="int",
+            fallback=(env_fallback, ["CONFLUENT_API_CACHE_MAX_ENTRIES"]),
+            default=512,
+        ),
     )
 
 
-def backoff(retry, retry_max_delay=12):
+def backoff(retry, retry_max_delay=12, delay=None, budget=None):
     randomness = random.randint(0, 1000) / 1000.0
-    delay = 2**retry + randomness
-    if delay > retry_max_delay:
-        delay = retry_max_delay + randomness
-    time.sleep(delay)
+    if delay is not None:
+        # The server told us how long to wait, only spread the retries a bit
+        delay = delay + randomness / 10
+    else:
+        delay = 2**retry + randomness
+        if delay > retry_max_delay:
+            delay = retry_max_delay + randomness
+
+    # Never sleep past the remaining retry budget
+    if budget is not None:
+        delay = min(delay, budget)
+    time.sleep(max(0, delay))
+
+
+class ConfluentRetryPolicy:
+    # Retry decisions shared by every request of a module run, including the
+    # worker threads of api_query_many().  Retries stop once the run has used
+    # up its time budget, and after threshold consecutive failed attempts
+    # (5xx or transport errors) the circuit opens and further requests fail
+    # without being sent.  Every cooldown seconds a single request is let
+    # through as a probe, any response that is not a server failure closes
+    # the circuit again, another failure keeps it open.
+
+    def __init__(self, budget, threshold, cooldown):
+        self.deadline = time.time() + budget
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened = None
+        self.lock = threading.Lock()
+
+    def remaining(self):
+        return(max(0, self.deadline - time.time()))
+
+    def retryable(self, method, status):
+        # Only 429 is safe to retry for POST, the request may have been
+        # processed before a 5xx or a dropped connection
+        if status == 429:
+            return(True)
+        return(method != "POST" and (status == -1 or status in RETRYABLE_STATUSES))
+
+    def record(self, status):
+        with self.lock:
+            if status == -1 or (status >= 500 and status in RETRYABLE_STATUSES):
+                self.failures += 1
+                if self.threshold and self.failures >= self.threshold:
+                    self.opened = time.time()
+            elif status != 429:
+                self.failures = 0
+                self.opened = None
+
+    def allow(self):
+        # Whether a request may be sent.  While the circuit is open the
+        # first request after the cooldown goes out as the probe, and the
+        # cooldown restarts so the others wait for its outcome.
+        with self.lock:
+            if self.opened is None:
+                return(True)
+            if time.time() - self.opened < self.cooldown:
+                return(False)
+            self.opened = time.time()
+            return(True)
+
+    def circuit_open(self):
+        return(self.opened is not None)
+
+
+def confluent_retry_policy(module):
+    # One policy per module object rather than per process: the controller
+    # plugins run in the long-lived controller process (and its forks), where
+    # a process-wide budget would run out minutes into the playbook
+    policy = getattr(module, "_confluent_retry_policy", None)
+    if policy is None:
+        policy = module._confluent_retry_policy = ConfluentRetryPolicy(
+            budget=module.params["api_retry_budget"],
+            threshold=module.params["api_circuit_breaker_threshold"],
+            cooldown=module.params["api_retry_max_delay"],
+        )
+    return(policy)
+
+
+def retry_after(info):
+    # Seconds the server asked us to wait, from Retry-After or the
+    # RateLimit-Reset / X-RateLimit-Reset headers.  None if not provided.
+    value = info.get("retry-after")
+    if value:
+        try:
+            return(max(0, float(value)))
+        except ValueError:
+            date = parsedate_tz(value)
+            if date:
+                return(max(0, mktime_tz(date) - time.time()))
+
+    for header in ("ratelimit-reset", "x-ratelimit-reset"):
+        value = info.get(header)
+        if not value:
+            continue
+        try:
+            value = float(value)
+        except ValueError:
+            continue
+        # Either a delta in seconds or an epoch timestamp
+        return(max(0, value - time.time() if value > 1000000000 else value))
+
+    return(None)
+
+
+def rate_limit_exhausted(info):
+    # True when the server reports no requests left in the current window
+    for header in ("ratelimit-remaining", "x-ratelimit-remaining"):
+        if info.get(header) is not None:
+            try:
+                return(float(info[header]) <= 0)
+            except ValueError:
+                pass
+    return(False)
+
+
+class ConfluentRateLimiter:
+    # Token bucket shared by every fork through a small state file guarded
+    # with flock().  Each request reserves a slot in the bucket under the lock
+    # and then sleeps outside of it until the slot is due, so concurrent
+    # workers are spread out instead of bursting together.  A reset time sent
+    # by the server blocks every worker until it has passed.
+
+    def __init__(self, path, rate):
+        self.path = path
+        self.rate = float(rate)
+        self.burst = max(1.0, self.rate)
+        self.lock = threading.Lock()
+
+    def update(self, func):
+        # Read-modify-write the shared state under the lock
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None
+
+        with self.lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                raw = os.read(fd, 4096)
+                try:
+                    state = json.loads(to_text(raw)) if raw else dict()
+                except ValueError:
+                    state = dict()
+
+                now = time.time()
+                tokens = state.get("tokens", self.burst)
+                tokens = min(self.burst, tokens + (now - state.get("updated", now)) * self.rate)
+                state.update(tokens=tokens, updated=now)
+
+                result = func(state, now)
+
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, json.dumps(state).encode())
+            finally:
+                os.close(fd)
+        return(result)
+
+    def acquire(self):
+        def reserve(state, now):
+            wait = max(0, state.get("blocked_until", 0) - now)
+            state["tokens"] -= 1
+            if state["tokens"] < 0:
+                wait = max(wait, -state["tokens"] / self.rate)
+            return(wait)
+
+        wait = self.update(reserve)
+        if wait > 0:
+            time.sleep(wait)
+
+    def block(self, delay):
+        def set_blocked(state, now):
+            state["blocked_until"] = max(state.get("blocked_until", 0), now + delay)
+            state["tokens"] = min(state["tokens"], 0)
+
+        self.update(set_blocked)
+
+
+def confluent_rate_limiter(module, credential_hash):
+    # Returns the shared rate limiter, or None when api_rate_limit is unset
+    if not module.params.get("api_rate_limit"):
+        return(None)
+
+    path = module.params.get("api_rate_limit_file") or os.path.join(
+        tempfile.gettempdir(), "ansible-confluent-ratelimit-%s.json" % credential_hash[:16])
+    if path not in _LIMITERS:
+        _LIMITERS[path] = ConfluentRateLimiter(path, module.params["api_rate_limit"])
+    return(_LIMITERS[path])
+
+
+class ConfluentSingleFlight:
+    # Coalesces identical GET requests made at the same time by different
+    # forks.  Requests are keyed by URL and credential hash.  The first
+    # process to take the flock() of a key performs the request and
+    # publishes a successful response next to the lock, the others block on
+    # the lock and then reuse that response, provided it was published at
+    # or after the moment they asked.  When the leader failed the next
+    # process in line sends the request itself.
+    #
+    # Responses hold organization data, so the directory must be private to
+    # the user, and published responses are only kept for ttl seconds, long
+    # enough for the waiting forks to pick them up.
+
+    def __init__(self, path, ttl=10, lock_ttl=300):
+        self.path = path
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+
+    def key(self, uri, credential_hash):
+        return(hashlib.sha256(("%s %s" % (credential_hash, uri)).encode()).hexdigest())
+
+    def private(self):
+        # Create the directory, or check that an existing one is a directory
+        # of ours that nobody else can write to
+        try:
+            os.makedirs(self.path, 0o700)
+        except OSError:
+            pass
+        try:
+            st = os.lstat(self.path)
+        except OSError:
+            return(False)
+        uid = os.getuid() if hasattr(os, "getuid") else st.st_uid
+        return(stat.S_ISDIR(st.st_mode) and st.st_uid == uid and not st.st_mode & 0o077)
+
+    def published(self, key, since):
+        try:
+            with open(os.path.join(self.path, "%s.json" % key)) as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            return(None)
+        if not since <= entry["published_at"] <= time.time():
+            return(None)
+        return(entry)
+
+    def publish(self, key, body, info):
+        entry = dict(
+            published_at=time.time(),
+            body=to_text(body, errors="surrogate_or_strict"),
+            info=dict((k, v) for k, v in info.items() if k != "wire_bytes"),
+        )
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.rename(tmp_path, os.path.join(self.path, "%s.json" % key))
+
+    def sweep(self):
+        # Remove expired responses, and lock files nobody used for a while
+        now = time.time()
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return
+        for name in names:
+            ttl = self.lock_ttl if name.endswith(".lock") else self.ttl
+            entry_path = os.path.join(self.path, name)
+            try:
+                if now - os.path.getmtime(entry_path) > ttl:
+                    os.remove(entry_path)
+            except OSError:
+                pass
+
+    def run(self, key, request):
+        # Returns (body, info, shared), shared tells whether the response
+        # came from another request
+        try:
+            import fcntl
+        except ImportError:
+            return(request() + (False,))
+
+        started = time.time()
+        if not self.private():
+            return(request() + (False,))
+        self.sweep()
+
+        try:
+            lock_path = os.path.join(self.path, "%s.lock" % key)
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            os.utime(lock_path, None)
+        except OSError:
+            return(request() + (False,))
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            entry = self.published(key, started)
+            if entry:
+                return(entry["body"], entry["info"], True)
+
+            body, info = request()
+            if info["status"] == 200:
+                try:
+                    self.publish(key, body, info)
+                except (IOError, OSError):
+                    pass
+            return(body, info, False)
+        finally:
+            os.close(fd)
+
+
+def confluent_single_flight(module):
+    # Returns the request coalescer, or None when api_coalesce is unset.
+    # The directory is per user, responses are only shared between forks
+    # using the same credentials.
+    if not module.params.get("api_coalesce"):
+        return(None)
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return(ConfluentSingleFlight(os.path.join(tempfile.gettempdir(), "ansible-confluent-flight-%d" % uid)))
+
+
+class ConfluentApiError(Exception):
+    # Raised instead of failing the module when fail_on_error is off
+    def __init__(self, msg, info):
+        super(ConfluentApiError, self).__init__(msg)
+        self.info = info
+
+
+class ConfluentHTTPSConnection(http_client.HTTPSConnection):
+    # HTTPSConnection that resumes a previously negotiated TLS session, so a
+    # reconnect to the same host skips the full handshake.
+    tls_session = None
+
+    def connect(self):
+        http_client.HTTPConnection.connect(self)
+        server_hostname = self._tunnel_host or self.host
+        try:
+            self.sock = self._context.wrap_socket(self.sock, server_hostname=server_hostname, session=self.tls_session)
+        except TypeError:
+            # Python < 3.6 cannot resume sessions
+            self.sock = self._context.wrap_socket(self.sock, server_hostname=server_hostname)
+
+
+def decompress(body, encoding):
+    # Decodes a gzip or deflate (zlib) encoded response body
+    if encoding in ("gzip", "deflate") and body:
+        return(zlib.decompress(body, 32 + zlib.MAX_WBITS))
+    return(body)
+
+
+class ConfluentResponseStream:
+    # Body of a streamed response.  read() returns the next decompressed
+    # chunk as it arrives, b"" at the end.  Once the body has been read to
+    # the end the connection goes back to the pool, a stream closed early
+    # drops it.  on_close, when set, is called with the stream once it is
+    # done, wire_bytes then holds the number of bytes received.
+
+    def __init__(self, session, key, conn, resp, chunk_size=16384):
+        self.session = session
+        self.key = key
+        self.conn = conn
+        self.resp = resp
+        self.chunk_size = chunk_size
+        self.wire_bytes = 0
+        self.done = False
+        self.on_close = None
+
+        self.decompressor = None
+        if resp.getheader("Content-Encoding", "").lower() in ("gzip", "deflate"):
+            self.decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+
+    def read(self):
+        while not self.done:
+            # Decompressed output is capped at chunk_size, the rest of the
+            # input waits in unconsumed_tail
+            if self.decompressor and self.decompressor.unconsumed_tail:
+                data = self.decompressor.decompress(self.decompressor.unconsumed_tail, self.chunk_size)
+                if data:
+                    return(data)
+                continue
+
+            data = self.resp.read(self.chunk_size)
+            self.wire_bytes += len(data)
+            if not data:
+                tail = self.decompressor.flush() if self.decompressor else b""
+                self.finish(complete=True)
+                return(tail)
+            if self.decompressor:
+                data = self.decompressor.decompress(data, self.chunk_size)
+            # A small compressed chunk may not produce any output yet
+            if data:
+                return(data)
+        return(b"")
+
+    def finish(self, complete):
+        if self.done:
+            return
+        self.done = True
+        if complete:
+            self.session.release(self.key, self.conn, self.resp)
+        else:
+            self.conn.close()
+        if self.on_close:
+            self.on_close(self)
+
+    def close(self):
+        self.finish(complete=False)
+
+
+class ConfluentJSONStream:
+    # Incremental decoder for list pages.  items() yields the elements of the
+    # top level "data" array as soon as each of them has arrived, the other
+    # top level fields (metadata, kind, ...) end up in document.  Only the
+    # not yet decoded tail of the body is kept in memory.
+
+    WHITESPACE = " \t\n\r"
+    DELIMITERS = WHITESPACE + ",]}"
+
+    def __init__(self, stream, key="data"):
+        self.stream = stream
+        self.key = key
+        self.document = dict()
+        self.decoder = json.JSONDecoder()
+        self.text = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        # Append the next chunk to the buffer, False once the body has ended
+        if self.eof:
+            return(False)
+        data = self.stream.read()
+        if not data:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + self.text.decode(data, final=self.eof)
+        self.pos = 0
+        return(not self.eof)
+
+    def peek(self):
+        # Next non-whitespace character, "" at the end of the body
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return(self.buf[self.pos])
+            if not self.fill() and self.pos >= len(self.buf):
+                return("")
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError("Expected one of %s in the response, got %r" % (chars, char or "end of data"))
+        self.pos += 1
+        return(char)
+
+    def value(self):
+        # Decode the complete JSON value at the current position
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if not self.fill():
+                    raise
+                continue
+            # A number is only complete once a delimiter follows it, a chunk
+            # may end right after "1" or "1." of "1.5e3"
+            if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                    and (end == len(self.buf) or self.buf[end] not in self.DELIMITERS) and self.fill():
+                continue
+            self.pos = end
+            return(value)
+
+    def items(self):
+        self.expect("{")
+        if self.peek() == "}":
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            if key == self.key and self.peek() == "[":
+                self.pos += 1
+                if self.peek() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        yield self.value()
+                        if self.expect(",]") == "]":
+                            break
+            else:
+                self.document[key] = self.value()
+            if self.expect(",}") == "}":
+                return
+
+
+class ConfluentSession:
+    # Keep-alive connection pool.  Idle connections are parked per host and
+    # handed out to one request at a time, so the pool can be shared between
+    # threads.  Proxies are taken from the usual *_proxy environment variables.
+    # Responses are requested gzip or deflate compressed and decoded here.
+
+    def __init__(self, validate_certs=True, timeout=60):
+        self.validate_certs = validate_certs
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.idle = dict()
+        self.tls_sessions = dict()
+
+        # Counters, handshakes_avoided is the number of requests that were
+        # served over an already established connection
+        self.requests = 0
+        self.connections = 0
+        self.handshakes_avoided = 0
+        self.throttled = 0
+
+        self.context = ssl.create_default_context()
+        if not validate_certs:
+            self.context.check_hostname = False
+            self.context.verify_mode = ssl.CERT_NONE
+
+    def connect(self, scheme, host, port):
+        from ansible.module_utils.six.moves.urllib.request import getproxies, proxy_bypass
+
+        proxy = getproxies().get(scheme)
+        if proxy and proxy_bypass(host):
+            proxy = None
+
+        tunnel_headers = dict()
+        if proxy:
+            proxy = urlparse(proxy if "://" in proxy else "http://" + proxy)
+            if proxy.username:
+                auth = "%s:%s" % (unquote(proxy.username), unquote(proxy.password or ""))
+                tunnel_headers["Proxy-Authorization"] = "Basic %s" % (base64.standard_b64encode(auth.encode()).decode())
+            conn_host, conn_port = proxy.hostname, proxy.port or 8080
+        else:
+            conn_host, conn_port = host, port
+
+        if scheme == "https":
+            conn = ConfluentHTTPSConnection(conn_host, conn_port, timeout=self.timeout, context=self.context)
+            conn.tls_session = self.tls_sessions.get((host, port))
+            if proxy:
+                conn.set_tunnel(host, port, headers=tunnel_headers)
+        else:
+            conn = http_client.HTTPConnection(conn_host, conn_port, timeout=self.timeout)
+
+        # Plain http through a proxy needs the absolute URL as request target
+        conn.absolute_target = bool(proxy) and scheme != "https"
+        conn.proxy_headers = tunnel_headers
+        return(conn)
+
+    def acquire(self, key):
+        with self.lock:
+            self.requests += 1
+            if self.idle.get(key):
+                self.handshakes_avoided += 1
+                return(self.idle[key].pop(), True)
+            self.connections += 1
+        return(self.connect(*key), False)
+
+    def release(self, key, conn, resp):
+        if resp.will_close:
+            conn.close()
+            return
+
+        with self.lock:
+            sock_session = getattr(conn.sock, "session", None)
+            if sock_session is not None:
+                self.tls_sessions[key[1:]] = sock_session
+            self.idle.setdefault(key, []).append(conn)
+
+    def request(self, uri, method="GET", data=None, headers=None, stream=False):
+        # Returns (body, info) where info mirrors what fetch_url() reports,
+        # plus wire_bytes, the size of the body as received.  With stream a
+        # successful response body is returned as a ConfluentResponseStream
+        # that has not been read yet.
+        url = urlparse(uri)
+        key = (url.scheme, url.hostname, url.port or (443 if url.scheme == "https" else 80))
+        target = url.path + ("?" + url.query if url.query else "")
+
+        headers = dict(headers or {})
+        headers.setdefault("Accept-Encoding", "gzip, deflate")
+        if data is not None:
+            headers["Content-Type"] = "application/json"
+
+        info = dict(url=uri, status=-1)
+        for attempt in range(0, 2):
+            conn, reused = self.acquire(key)
+            try:
+                if conn.absolute_target:
+                    headers.update(conn.proxy_headers)
+                conn.request(method, uri if conn.absolute_target else target, body=data, headers=headers)
+                resp = conn.getresponse()
+                if stream and resp.status == 200:
+                    body = ConfluentResponseStream(self, key, conn, resp)
+                else:
+                    body = resp.read()
+            except (http_client.HTTPException, socket.error, ssl.SSLError) as e:
+                conn.close()
+                # A parked connection may have been closed by the server, in
+                # that case retry once on a fresh connection
+                if reused and attempt == 0:
+                    continue
+                info["msg"] = "Request failed: %s" % to_native(e)
+                return("", info)
+
+            info.update(dict((k.lower(), v) for k, v in resp.getheaders()))
+            if isinstance(body, ConfluentResponseStream):
+                info.update(status=resp.status, msg="%s (streamed)" % resp.reason)
+                return(body, info)
+
+            self.release(key, conn, resp)
+            info["wire_bytes"] = len(body)
+            try:
+                body = decompress(body, info.get("content-encoding"))
+            except zlib.error as e:
+                info.update(status=-1, msg="Failed to decode the response: %s" % to_native(e))
+                return("", info)
+            info.update(status=resp.status, msg="%s (%d bytes)" % (resp.reason, len(body)))
+            if resp.status >= 400:
+                info["body"] = to_text(body, errors="surrogate_or_strict")
+            return(body, info)
+
+    def close(self):
+        with self.lock:
+            for conns in self.idle.values():
+                for conn in conns:
+                    conn.close()
+            self.idle = dict()
+
+
+class ConfluentApiStats:
+    # Records every API call of a module run: method, path, final status,
+    # time on the wire, bytes received, retries, and time spent sleeping in
+    # backoff() or waiting on the rate limiter.  Only aggregates are kept in
+    # memory, each call is also appended as a JSON line to the file named by
+    # CONFLUENT_API_TRACE when that is set.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = dict(
+            calls=0,
+            requests=0,
+            retries=0,
+            cache_hits=0,
+            coalesced=0,
+            bytes_received=0,
+            latency=0.0,
+            latency_max=0.0,
+            backoff_time=0.0,
+            rate_limit_wait=0.0,
+        )
+        self.statuses = dict()
+        self.methods = dict()
+        self.slowest = None
+
+    def record(self, module, call):
+        with self.lock:
+            totals = self.totals
+            totals["calls"] += 1
+            totals["requests"] += call["attempts"]
+            totals["retries"] += call["retries"]
+            totals["cache_hits"] += 1 if call["cached"] else 0
+            totals["coalesced"] += 1 if call.get("coalesced") else 0
+            totals["bytes_received"] += call["bytes"]
+            totals["latency"] += call["latency"]
+            totals["latency_max"] = max(totals["latency_max"], call["latency"])
+            totals["backoff_time"] += call["backoff_time"]
+            totals["rate_limit_wait"] += call["rate_limit_wait"]
+            status = str(call["status"])
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.methods[call["method"]] = self.methods.get(call["method"], 0) + 1
+            if not self.slowest or call["latency"] > self.slowest["latency"]:
+                self.slowest = call
+
+        trace = os.environ.get("CONFLUENT_API_TRACE")
+        if trace:
+            line = dict(call, time=time.time(), pid=os.getpid(), module=getattr(module, "_name", None))
+            try:
+                with open(trace, "a") as f:
+                    f.write(json.dumps(line) + "\n")
+            except (IOError, OSError) as e:
+                if hasattr(module, "warn"):
+                    module.warn("Unable to write API trace to %s: %s" % (trace, to_native(e)))
+
+    def summary(self):
+        with self.lock:
+            summary = dict(self.totals)
+            summary.update(statuses=dict(self.statuses), methods=dict(self.methods))
+            if self.slowest:
+                summary["slowest"] = dict((k, self.slowest[k]) for k in ("method", "path", "status", "latency"))
+
+        for key, session in _SESSIONS.items():
+            if key[0] != os.getpid():
+                continue
+            summary["connections"] = summary.get("connections", 0) + session.connections
+            summary["handshakes_avoided"] = summary.get("handshakes_avoided", 0) + session.handshakes_avoided
+            summary["throttled"] = summary.get("throttled", 0) + session.throttled
+        return(summary)
+
+
+def confluent_stats():
+    global _STATS
+    if _STATS is None:
+        _STATS = ConfluentApiStats()
+    return(_STATS)
+
+
+def confluent_result(module, result):
+    # Adds the api_stats summary and the profile to a module result when
+    # requested
+    if module.params.get("api_stats"):
+        result["api_stats"] = confluent_stats().summary()
+    profiler = getattr(module, "_confluent_profiler", None)
+    if profiler:
+        result["profile"] = profiler.stop()
+    return(result)
+
+
+class ConfluentProfiler:
+    # Profiles the rest of the module run with cProfile, and allocations
+    # with tracemalloc when asked to.  Profiling stops in confluent_result,
+    # or in exit_json and fail_json which are wrapped for the modules that
+    # end some other way (a bound method looked up before profiling
+    # started, as in "module.exit_json(**confluent_result(...))", is not
+    # wrapped).  The reports are written to the profile directory and
+    # summarized under "profile" in the result.
+
+    def __init__(self, module, path, memory=False, top=10):
+        import cProfile
+
+        self.module = module
+        self.path = path
+        self.top = top
+        self.summary = None
+        self.prefix = os.path.join(path, "%s-%d-%d" % (getattr(module, "_name", "confluent"), os.getpid(), time.time() * 1000))
+
+        # Tracing already started by someone else is left running
+        self.tracemalloc = self.tracing = None
+        if memory:
+            import tracemalloc
+            self.tracemalloc = tracemalloc
+            self.tracing = not tracemalloc.is_tracing()
+            if self.tracing:
+                tracemalloc.start()
+
+        for name in ("exit_json", "fail_json"):
+            setattr(module, name, self.wrap(getattr(module, name)))
+
+        self.started = time.time()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def wrap(self, method):
+        def wrapped(*args, **kwargs):
+            kwargs["profile"] = self.stop()
+            return(method(*args, **kwargs))
+        return(wrapped)
+
+    def stop(self):
+        if self.summary is not None:
+            return(self.summary)
+        self.profile.disable()
+        import pstats
+
+        self.summary = dict(wall_time=time.time() - self.started)
+        hottest = sorted(pstats.Stats(self.profile).stats.items(), key=lambda s: s[1][2], reverse=True)
+        self.summary["functions"] = [dict(
+            function="%s:%d(%s)" % (os.sep.join(f[0].split(os.sep)[-2:]), f[1], f[2]),
+            calls=s[1], tottime=round(s[2], 6), cumtime=round(s[3], 6),
+        ) for f, s in hottest[:self.top]]
+
+        allocations = []
+        if self.tracemalloc:
+            snapshot = self.tracemalloc.take_snapshot()
+            self.summary["memory_peak"] = self.tracemalloc.get_traced_memory()[1]
+            if self.tracing:
+                self.tracemalloc.stop()
+            allocations = snapshot.statistics("lineno")
+
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path)
+            self.profile.dump_stats(self.prefix + ".pstats")
+            self.summary["pstats"] = self.prefix + ".pstats"
+            if self.tracemalloc:
+                with open(self.prefix + ".memory.txt", "w") as f:
+                    for stat in allocations[:100]:
+                        f.write("%s\n" % stat)
+                self.summary["memory"] = self.prefix + ".memory.txt"
+        except (IOError, OSError) as e:
+            self.module.warn("Unable to write profile to %s: %s" % (self.path, to_native(e)))
+        return(self.summary)
+
+
+def confluent_profiler(module):
+    # Starts profiling the module once, when api_profile is set.  The
+    # controller-side plugins, whose stand-in module never exits, are not
+    # profiled.
+    path = module.params.get("api_profile")
+    if not path or not hasattr(module, "exit_json") or getattr(module, "_confluent_profiler", None):
+        return(None)
+    module._confluent_profiler = ConfluentProfiler(module, path, memory=module.params.get("api_profile_memory"))
+    return(module._confluent_profiler)
+
+
+def resource_project(resource, fields):
+    # Copy of resource holding only the given fields, dotted names select
+    # nested values (e.g. metadata.created_at).  Missing fields are skipped.
+    if not fields:
+        return(resource)
+
+    projected = dict()
+    for field in fields:
+        value = resource
+        for part in field.split("."):
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projected
+            parts = field.split(".")
+            for part in parts[:-1]:
+                target = target.setdefault(part, dict())
+            target[parts[-1]] = value
+    return(projected)
+
+
+def resource_value(resource, field):
+    # Value of a dotted field, None when missing
+    value = resource
+    for part in field.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return(None)
+        value = value[part]
+    return(value)
+
+
+def resource_info(module, resources, key, name_field="display_name"):
+    # Result of the *_info modules: resources filtered by the ids or names
+    # option and projected to fields as they stream in, returned as
+    # {"count": n} with count_only, as {key: [...]} with output=list, and
+    # keyed by id otherwise.  Iteration stops once every requested id has
+    # been seen, so the remaining pages are never fetched.
+    ids = module.params.get("ids")
+    names = module.params.get("names")
+    fields = module.params.get("fields")
+    count_only = module.params.get("count_only")
+
+    selected = dict() if module.params.get("output") == "dict" else list()
+    count = 0
+    pending = set(ids or [])
+    for resource in resources:
+        if ids:
+            if resource["id"] not in pending:
+                continue
+            pending.discard(resource["id"])
+        elif names and resource_value(resource, name_field) not in names:
+            continue
+
+        count += 1
+        if count_only:
+            pass
+        elif isinstance(selected, dict):
+            selected[resource["id"]] = resource_project(resource, fields)
+        else:
+            selected.append(resource_project(resource, fields))
+
+        if ids and not pending:
+            break
+
+    if count_only:
+        return({"count": count})
+    if isinstance(selected, list):
+        return({key: selected})
+    return(selected)
+
+
+class ConfluentConnectionSession:
+    # Sends requests through the persistent connection daemon and the
+    # confluent.cloud.confluent httpapi plugin, which keeps one warm session
+    # for every task of the play.  Same interface as ConfluentSession, except
+    # that bodies always arrive complete, the daemon has decoded them.
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.handshakes_avoided = 0
+        self.throttled = 0
+
+    def request(self, uri, method="GET", data=None, headers=None, stream=False):
+        url = urlparse(uri)
+        path = url.path + ("?" + url.query if url.query else "")
+
+        from ansible.module_utils.connection import Connection, ConnectionError
+        try:
+            resp = Connection(self.socket_path).send_request(data, path, method=method, headers=headers)
+        except ConnectionError as e:
+            return("", dict(url=uri, status=-1, msg="Request failed: %s" % to_native(e)))
+
+        with self.lock:
+            self.requests += 1
+            if resp["reused"]:
+                self.handshakes_avoided += 1
+            else:
+                self.connections += 1
+
+        return(resp["body"], resp["info"])
+
+    def close(self):
+        pass
+
+
+def confluent_session(module):
+    # Sessions are per process.  Controller plugins run in the main process
+    # and workers are forked from it, an inherited keep-alive connection
+    # must never be shared with the parent or sibling forks.
+    pid = os.getpid()
+
+    # Tasks running under the httpapi connection go through its daemon
+    socket_path = getattr(module, "_socket_path", None)
+    if socket_path:
+        key = (pid, socket_path)
+        if key not in _SESSIONS:
+            _SESSIONS[key] = ConfluentConnectionSession(socket_path)
+        return(_SESSIONS[key])
+
+    key = (pid, module.params["validate_certs"], module.params["api_timeout"])
+    if key not in _SESSIONS:
+        _SESSIONS[key] = ConfluentSession(validate_certs=key[1], timeout=key[2])
+    return(_SESSIONS[key])
 
 
 class AnsibleConfluent:
@@ -74,10 +1094,15 @@ class AnsibleConfluent:
         resource_create_param_keys=None,
         resource_update_param_keys=None,
         resource_update_method="PATCH",
+        fail_on_error=True,
+        cache=None,
     ):
 
         self.module = module
 
+        # Optional cProfile/tracemalloc reports of the module run
+        confluent_profiler(module)
+
         # The API resource path e.g /ssh-keys
         self.resource_path = resource_path
 
@@ -90,235 +1115,401 @@ class AnsibleConfluent:
         # Some resources have PUT, many have PATCH
         self.resource_update_method = resource_update_method
 
-        auth = "%s:%s" % (self.module.params["api_key"],
-                          self.module.params["api_secret"])
+        # Raise ConfluentApiError rather than fail_json, e.g. from worker
+        # threads that report failures per item
+        self.fail_on_error = fail_on_error
+
         self.headers = {
-            "Authorization": "Basic %s" % (base64.standard_b64encode(auth.encode()).decode()),
             "User-Agent": CONFLUENT_USER_AGENT,
             "Accept": "application/json",
         }
 
+        # Under the httpapi connection the plugin authenticates, otherwise
+        # credentials are required
+        socket_path = getattr(module, "_socket_path", None)
+        if self.module.params["api_key"] and self.module.params["api_secret"]:
+            auth = "%s:%s" % (self.module.params["api_key"],
+                              self.module.params["api_secret"])
+            self.headers["Authorization"] = "Basic %s" % (base64.standard_b64encode(auth.encode()).decode())
+        elif socket_path:
+            auth = socket_path
+        else:
+            self.module.fail_json(msg="api_key and api_secret are required unless using the httpapi connection")
+        self.credential_hash = hashlib.sha256(auth.encode()).hexdigest()
+
+        # Keep-alive connection pool shared across the module run
+        self.session = confluent_session(module)
+
+        # Optional on-disk cache for GET responses, see confluent_cache()
+        self.cache = cache
+
+        # Optional client-side rate limiter shared across forks
+        self.limiter = confluent_rate_limiter(module, self.credential_hash)
+
+        # Optional coalescing of identical GET requests across forks
+        self.flight = confluent_single_flight(module)
+
+        # Per-request instrumentation
+        self.stats = confluent_stats()
+
+        # Retry budget and circuit breaker
+        self.retry_policy = confluent_retry_policy(module)
+
         # Hook custom configurations
         self.configure()
 
     def configure(self):
         pass
 
-    def api_next_page(self, uri):
+    def api_url(self, path, query=None):
+        # Build an absolute request URL, query parameters go on the URL
+        url = self.module.params["api_endpoint"] + path
+        if query:
+            url += "?" + urlencode(query)
+        return(url)
 
-        info = dict()
-        resp_body = None
-        for retry in range(0, self.module.params["api_retries"]):
-            resp, info = fetch_url(
-                self.module,
-                uri,
-                headers=self.headers,
-                timeout=self.module.params["api_timeout"],
-            )
+    def api_fetch(self, uri, method="GET", data=None, stream=False):
+        # stream asks for a ConfluentResponseStream body when the response
+        # comes straight from the network, cached responses are always whole
 
-            resp_body = resp.read() if resp is not None else ""
+        if method != "GET" or not self.cache or not self.module.params.get("api_cache"):
+            if method == "GET" and self.flight:
+                return(self.api_coalesce(uri))
+            return(self.api_send(uri, method=method, data=data, stream=stream))
 
-            # Check for 429 Too Many Requests
-            if info["status"] != 429:
-                break
+        key = self.cache.key(uri, self.credential_hash)
 
-            # Confluent Cloud has a rate limiting requests per second, try to
-            # be polite.  Use exponential backoff plus a little bit of randomness
-            backoff(retry=retry, retry_max_delay=self.module.params["api_retry_max_delay"])
+        def cached():
+            entry = self.cache.get(key)
+            if entry and entry["fresh"]:
+                self.cache.touch(key)
+                self.stats.record(self.module, dict(
+                    method=method, path=urlparse(uri).path, status=200, cached=True, attempts=0, retries=0,
+                    latency=0.0, bytes=0, backoff_time=0.0, rate_limit_wait=0.0,
+                ))
+                return(entry["body"], dict(url=uri, status=200, msg="OK (cached)"))
+            return(None)
 
-        if info["status"] in (200, 201, 202):
-            # Request subsequent page if next
-            resp = self.module.from_json(to_text(resp_body, errors="surrogate_or_strict"))
-            if 'metadata' in resp and 'next' in resp['metadata']:
-                resp['data'] += self.api_next_page(resp['metadata']['next'])
+        def fetch():
+            # Once the flight is ours the fork that went first may already
+            # have filled or revalidated the entry
+            if self.flight:
+                hit = cached()
+                if hit:
+                    return(hit)
 
-            return(resp['data'])
+            # Revalidate an expired entry if the server gave us a validator
+            entry = self.cache.get(key)
+            headers = dict()
+            if entry and entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry and entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
 
-        else:
-            return([])
+            resp_body, info = self.api_send(uri, headers=headers)
+            if info["status"] == 304 and entry:
+                self.cache.touch(key, refresh=True)
+                info.update(status=200, msg="OK (revalidated)")
+                return(entry["body"], info)
 
-    def api_query(self, path, method="GET", data=None):
+            if info["status"] == 200:
+                self.cache.put(key, uri, info, resp_body)
 
-        if method == "GET" and data:
-            data_encoded = data.copy()
-            try:
-                data = urllib.urlencode(data_encoded)
-            except AttributeError:
-                data = urllib.parse.urlencode(data_encoded)
-        else:
-            data = self.module.jsonify(data)
+            return(resp_body, info)
+
+        hit = cached()
+        if hit:
+            return(hit)
+        # Misses and revalidations are coalesced like plain GETs
+        if self.flight:
+            return(self.api_coalesce(uri, fetch))
+        return(fetch())
+
+    def api_coalesce(self, uri, request=None):
+        # GET through the single-flight coalescer, a response shared by
+        # another fork is recorded like a cache hit
+        key = self.flight.key(uri, self.credential_hash)
+        resp_body, info, shared = self.flight.run(key, request or (lambda: self.api_send(uri)))
+        if shared:
+            self.stats.record(self.module, dict(
+                method="GET", path=urlparse(uri).path, status=info["status"], cached=True, coalesced=True, attempts=0,
+                retries=0, latency=0.0, bytes=0, backoff_time=0.0, rate_limit_wait=0.0,
+            ))
+        return(resp_body, info)
+
+    def api_send(self, uri, method="GET", data=None, headers=None, stream=False):
+
+        request_headers = dict(self.headers)
+        request_headers.update(headers or {})
+
+        call = dict(method=method, path=urlparse(uri).path, cached=False, attempts=0, retries=0,
+                    latency=0.0, bytes=0, backoff_time=0.0, rate_limit_wait=0.0)
 
         info = dict()
         resp_body = None
-        for retry in range(0, self.module.params["api_retries"]):
-            resp, info = fetch_url(
-                self.module,
-                self.module.params["api_endpoint"] + path,
+        retries = self.module.params["api_retries"]
+        for retry in range(0, retries):
+            if not self.retry_policy.allow():
+                info = dict(
+                    url=uri,
+                    status=-1,
+                    msg="Not sent, the circuit breaker opened after %d consecutive failures" % self.retry_policy.failures,
+                )
+                break
+
+            if self.limiter:
+                started = time.time()
+                self.limiter.acquire()
+                call["rate_limit_wait"] += time.time() - started
+
+            started = time.time()
+            resp_body, info = self.session.request(
+                uri,
                 method=method,
                 data=data,
-                headers=self.headers,
-                timeout=self.module.params["api_timeout"],
+                headers=request_headers,
+                stream=stream,
             )
+            call["latency"] += time.time() - started
+            call["attempts"] += 1
+            call["bytes"] += info.get("wire_bytes", 0)
+            self.retry_policy.record(info["status"])
+
+            # Pause every worker until the window resets once it is used up
+            if self.limiter and info["status"] != 429 and rate_limit_exhausted(info):
+                delay = retry_after(info)
+                if delay:
+                    self.limiter.block(delay)
+
+            # Retry 429 Too Many Requests, and 5xx or transport errors for
+            # requests that are safe to repeat, while attempts and the run's
+            # retry budget last
+            if not self.retry_policy.retryable(method, info["status"]):
+                break
 
-            resp_body = resp.read() if resp is not None else ""
+            if info["status"] == 429:
+                with self.session.lock:
+                    self.session.throttled += 1
 
-            # Check for 429 Too Many Requests
-            if info["status"] != 429:
+            budget = self.retry_policy.remaining()
+            delay = retry_after(info) if info["status"] in (429, 503) else None
+            if retry == retries - 1 or budget <= 0 or (delay is not None and delay > budget):
                 break
 
             # Confluent Cloud has a rate limiting requests per second, try to
-            # be polite.  Use exponential backoff plus a little bit of randomness
-            backoff(retry=retry, retry_max_delay=self.module.params["api_retry_max_delay"])
+            # be polite.  Honor the server provided reset time when there is
+            # one, otherwise use exponential backoff plus a little randomness.
+            # With the shared limiter the pause applies to every fork and the
+            # next acquire() does the waiting.
+            call["retries"] += 1
+            if self.limiter and info["status"] == 429 and delay is not None:
+                self.limiter.block(delay)
+            else:
+                started = time.time()
+                backoff(retry=retry, retry_max_delay=self.module.params["api_retry_max_delay"], delay=delay, budget=budget)
+                call["backoff_time"] += time.time() - started
+
+        call["status"] = info.get("status")
+        if isinstance(resp_body, ConfluentResponseStream):
+            # Recorded once the body has been received
+            def record(stream):
+                call["bytes"] += stream.wire_bytes
+                self.stats.record(self.module, call)
+            resp_body.on_close = record
+        else:
+            self.stats.record(self.module, call)
+        return(resp_body, info)
+
+    def api_response(self, path, method, resp_body, info):
 
         # Success with content
         if info["status"] in (200, 201, 202):
-            # Request subsequent page if next
-            resp = self.module.from_json(to_text(resp_body, errors="surrogate_or_strict"))
-            if 'metadata' in resp and 'next' in resp['metadata']:
-                resp['data'] += self.api_next_page(resp['metadata']['next'])
-
-            return(resp)
+            return(self.module.from_json(to_text(resp_body, errors="surrogate_or_strict")))
 
         # Success without content
         if info["status"] in (404, 204):
             return dict()
 
-        self.module.fail_json(
-            msg='Failure while calling the Confluent Cloud API with %s for "%s".' % (method, path),
+        msg = 'Failure while calling the Confluent Cloud API with %s for "%s".' % (method, path)
+        if not self.fail_on_error:
+            raise ConfluentApiError(msg, info)
+
+        self.module.fail_json(**confluent_result(self.module, dict(
+            msg=msg,
             fetch_url_info=info,
-        )
+        )))
 
-#    def query_filter_list_by_name(
-#        self,
-#        path,
-#        key_name,
-#        result_key,
-#        param_key=None,
-#        key_id=None,
-#        query_params=None,
-#        get_details=False,
-#        fail_not_found=False,
-#    ):
-#        param_value = self.module.params.get(param_key or key_name)
-#
-#        found = dict()
-#        for resource in self.query_list(path=path, result_key=result_key, query_params=query_params):
-#            if resource.get(key_name) == param_value:
-#                if found:
-#                    self.module.fail_json(msg="More than one record with name=%s found. " "Use multiple=yes if module supports it." % param_value)
-#                found = resource
-#        if found:
-#            if get_details:
-#                return self.query_by_id(resource_id=found[key_id])
-#            else:
-#                return found
-#
-#        elif fail_not_found:
-#            self.module.fail_json(msg="No Resource %s with %s found: %s" % (path, key_name, param_value))
-#
-#        return dict()
-
-#    def query_filter_list(self):
-#        # Returns a single dict representing the resource queryied by name
-#        return self.query_filter_list_by_name(
-#            key_name=self.resource_key_name,
-#            key_id=self.resource_key_id,
-#            get_details=self.resource_get_details,
-#            path=self.resource_path,
-#            result_key=self.resource_result_key_plural,
-#        )
-
-#    def query_by_id(self, resource_id=None, path=None, result_key=None):
-#        # Defaults
-#        path = path or self.resource_path
-#
-#        resource = self.api_query(path="%s%s" % (path, "/" + resource_id if resource_id else resource_id))
-#        if resource:
-#            return resource[result_key]
-#
-#        return dict()
-
-    def query(self):
-        # Returns a single dict representing the resource
-        resources = self.api_query(path=self.resource_path)
-        return(resources)
-
-#    def query_list(self, path=None, result_key=None, query_params=None):
-#        # Defaults
-#        path = path or self.resource_path
-#        result_key = result_key or self.resource_result_key_plural
-#
-#        resources = self.api_query(path=path, data=query_params)
-#       #return resources[result_key] if resources else []
-#       #self.module.fail_json(
-#       #    msg='',
-#       #    fetch_url_info=resources,
-#       #)
-#        return resources['data'] if resources else []
-
-#    """
-#    def wait_for_state(self, resource, key, state, cmp="="):
-#        for retry in range(0, 30):
-#            resource = self.query_by_id(resource_id=resource[self.resource_key_id])
-#            if cmp == "=":
-#                if key not in resource or resource[key] == state or not resource[key]:
-#                    break
-#            else:
-#                if key not in resource or resource[key] != state or not resource[key]:
-#                    break
-#            backoff(retry=retry)
-#        else:
-#            self.module.fail_json(msg="Wait for %s to become %s timed out" % (key, state))
-#
-#        return resource
-#    """
-
-#    def create_or_update(self):
-#        resource = self.query()
-#        if not resource:
-#            resource = self.create()
-#        else:
-#            resource = self.update(resource)
-#        return resource
-
-#    def present(self):
-#        self.get_result(self.create_or_update())
-
-    def create(self, data):
-        resource = dict()
-
-        if not self.module.check_mode:
-            resource = self.api_query(
-                path=self.resource_path,
-                method="POST",
-                data=data,
-            )
-        resource['changed'] = True
-        return(resource)
+    def api_query(self, path, method="GET", data=None):
+        # Issue a single request and return the decoded response.  List
+        # endpoints only return their first page here, use api_paginate()
+        # to walk the whole collection.
+        if method == "GET":
+            uri = self.api_url(path, data)
+            data = None
+        else:
+            uri = self.api_url(path)
+            data = self.module.jsonify(data) if data is not None else None
 
-    def update(self, cur_state, target_state):
-        resource = {'changed': False}
+        resp_body, info = self.api_fetch(uri, method=method, data=data)
 
-        for key in target_state.keys():
-            if key not in cur_state or cur_state[key] != target_state[key]:
-                resource['changed'] = True
-                break
+        # Writes invalidate cached reads of the collection they touched
+        if method != "GET" and self.cache and info["status"] < 400:
+            collection = path if method == "POST" else path.rsplit("/", 1)[0]
+            self.cache.invalidate(urlparse(self.api_url(collection)).path)
 
-        if resource["changed"]:
-            if not self.module.check_mode:
-                resource = self.api_query(
-                    path="%s/%s" % (self.resource_path, self.resource_key_id),
-                    method=self.resource_update_method,
-                    data=target_state,
-                )
-                resource['changed'] = True
+        return(self.api_response(path, method, resp_body, info))
 
-        return(resource)
+    def api_paginate(self, path, query=None, page_size=None, max_items=None):
+        # Generator yielding every resource of a list endpoint.  Pages are
+        # requested one at a time by following metadata.next in a loop, so
+        # stack depth and memory stay constant however large the collection
+        # is.  Iteration ends after max_items resources or as soon as the
+        # caller stops consuming (e.g. once the resources it wants are found).
+        # Pages coming from the network are decoded incrementally, resources
+        # are yielded while the rest of the page is still arriving.
+        query = dict(query or {})
+        query.setdefault("page_size", page_size or self.module.params["api_page_size"])
 
-    def absent(self):
-        if not self.module.check_mode:
-            self.api_query(
-                path="%s/%s" % (self.resource_path, self.resource_key_id),
-                method="DELETE",
-            )
-        return({'changed': True, 'id': self.resource_key_id})
+        uri = self.api_url(path, query)
+        count = 0
+        while uri:
+            resp_body, info = self.api_fetch(uri, stream=True)
+            if isinstance(resp_body, ConfluentResponseStream):
+                page = ConfluentJSONStream(resp_body)
+                resources = page.items()
+            else:
+                page = None
+                resp = self.api_response(path, "GET", resp_body, info)
+                # Drop the raw page so only the decoded copy is held
+                resp_body = None
+                resources = resp.get('data', [])
+
+            try:
+                for resource in resources:
+                    yield resource
+                    count += 1
+                    if max_items and count >= max_items:
+                        return
+                # Read up to the end of the body so the connection is reused
+                while page and resp_body.read():
+                    pass
+            except (ValueError, zlib.error, http_client.HTTPException, socket.error, ssl.SSLError) as e:
+                info = dict(info, status=-1, msg="Failed to read the response: %s" % to_native(e))
+                self.api_response(path, "GET", None, info)
+            finally:
+                if page:
+                    resp_body.close()
+
+            uri = (page.document if page else resp).get('metadata', {}).get('next')
+
+    def api_query_many(self, requests, concurrency=None, fail_on_error=None):
+        # Run a batch of independent requests on a pool of threads and return
+        # their results in input order.  Each request is a dict with path and
+        # optionally method, data and paginate (collect every page of a list
+        # endpoint into a list).  At most api_concurrency requests are in
+        # flight.  In adaptive mode the cap is halved whenever a request got
+        # throttled and grows back by one after a run of clean requests.
+        #
+        # Failed requests leave a ConfluentApiError in their slot when
+        # fail_on_error is off, otherwise the module fails once the batch
+        # is done.  Unexpected errors (undecodable bodies, unreadable rate
+        # limiter state) count as failed requests with status -1.
+        if fail_on_error is None:
+            fail_on_error = self.fail_on_error
+
+        max_concurrency = max(1, concurrency or self.module.params["api_concurrency"])
+        adaptive = self.module.params["api_concurrency_adaptive"]
+
+        # Workers must never call fail_json themselves
+        client = copy.copy(self)
+        client.fail_on_error = False
+
+        results = [None] * len(requests)
+        queue = list(reversed(list(enumerate(requests))))
+        cond = threading.Condition()
+        state = dict(active=0, limit=max_concurrency, clean=0, throttled=self.session.throttled)
+
+        def request_error(request, error):
+            msg = 'Failure while calling the Confluent Cloud API with %s for "%s": %s' % (
+                request.get("method", "GET"), request["path"], to_native(error))
+            return(ConfluentApiError(msg, dict(status=-1, msg=to_native(error))))
+
+        def run(request):
+            if request.get("paginate"):
+                return(list(client.api_paginate(request["path"], query=request.get("data"))))
+            return(client.api_query(request["path"], method=request.get("method", "GET"), data=request.get("data")))
+
+        def worker():
+            while True:
+                with cond:
+                    while queue and state["active"] >= state["limit"]:
+                        cond.wait()
+                    if not queue:
+                        return
+                    index, request = queue.pop()
+                    state["active"] += 1
+
+                try:
+                    results[index] = run(request)
+                except ConfluentApiError as e:
+                    results[index] = e
+                except Exception as e:
+                    results[index] = request_error(request, e)
+                finally:
+                    with cond:
+                        state["active"] -= 1
+                        if adaptive and self.session.throttled > state["throttled"]:
+                            state["throttled"] = self.session.throttled
+                            state["limit"] = max(1, state["limit"] // 2)
+                            state["clean"] = 0
+                        elif adaptive and state["limit"] < max_concurrency:
+                            state["clean"] += 1
+                            if state["clean"] >= state["limit"]:
+                                state["limit"] += 1
+                                state["clean"] = 0
+                        cond.notify_all()
+
+        threads = [threading.Thread(target=worker) for i in range(min(max_concurrency, len(requests)))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # A request whose worker died without a result did not succeed
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = request_error(requests[index], "no response")
+
+        if fail_on_error:
+            for result in results:
+                if isinstance(result, ConfluentApiError):
+                    self.module.fail_json(msg=to_native(result), fetch_url_info=result.info)
+
+        return(results)
+
+    def query_by_id(self, resource_id, path=None, query=None):
+        # Returns a single dict representing the resource, empty if not found
+        path = path or self.resource_path
+        return(self.api_query(path="%s/%s" % (path, resource_id), data=query))
+
+    def query_by_names(self, names, key_name=None, path=None):
+        # Single pass over the collection building an exact-match
+        # name -> resource index for the requested names.  Paging stops as
+        # soon as every name is found, the first match for a name wins.
+        key_name = key_name or self.resource_key_name
+        wanted = set(names)
+
+        index = dict()
+        for resource in self.api_paginate(path=path or self.resource_path):
+            name = resource.get(key_name)
+            if name in wanted and name not in index:
+                index[name] = resource
+                if len(index) == len(wanted):
+                    break
+
+        return(index)
+
+    def query(self, **kwargs):
+        # Returns a generator over every resource in the collection
+        return(self.api_paginate(path=self.resource_path, **kwargs))
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# Simplified BSD License (see licenses/simplified_bsd.txt or https://opensource.org/licenses/BSD-2-Clause)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+from ansible.module_utils._text import to_text
+from ansible.module_utils.six.moves.urllib.parse import urlparse
+
+# One response cache per module run, keyed by cache directory
+_CACHES = dict()
+
+
+class ConfluentResponseCache:
+    # On-disk cache of successful GET responses, one JSON file per request.
+    # Entries are keyed by the full request URL and a hash of the credentials,
+    # so different keys never share results.  Fresh entries are served without
+    # a request, expired ones are revalidated with If-None-Match /
+    # If-Modified-Since when the server sent an ETag or Last-Modified.  The
+    # least recently used entries are evicted beyond max_entries.
+
+    def __init__(self, path, ttl=60, max_entries=512):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def key(self, uri, credential):
+        return(hashlib.sha256(("%s %s" % (credential, uri)).encode()).hexdigest())
+
+    def entry_path(self, key):
+        return(os.path.join(self.path, "%s.json" % key))
+
+    def get(self, key):
+        try:
+            with open(self.entry_path(key)) as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            return(None)
+
+        entry["fresh"] = time.time() - entry["stored_at"] < self.ttl
+        return(entry)
+
+    def touch(self, key, refresh=False):
+        # Mark the entry as recently used, refresh restarts its TTL
+        entry_path = self.entry_path(key)
+        try:
+            if refresh:
+                with open(entry_path) as f:
+                    entry = json.load(f)
+                entry["stored_at"] = time.time()
+                self.write(entry_path, entry)
+            else:
+                os.utime(entry_path, None)
+        except (IOError, OSError, ValueError):
+            pass
+
+    def put(self, key, uri, info, body):
+        entry = dict(
+            uri=uri,
+            path=urlparse(uri).path,
+            stored_at=time.time(),
+            etag=info.get("etag"),
+            last_modified=info.get("last-modified"),
+            body=to_text(body, errors="surrogate_or_strict"),
+        )
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path, 0o700)
+            self.write(self.entry_path(key), entry)
+        except (IOError, OSError):
+            return
+        self.evict()
+
+    def write(self, entry_path, entry):
+        # Write to a temporary file first so readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.rename(tmp_path, entry_path)
+
+    def entries(self):
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return([])
+        return([os.path.join(self.path, n) for n in names if n.endswith(".json")])
+
+    def evict(self):
+        entries = self.entries()
+        if len(entries) <= self.max_entries:
+            return
+
+        def mtime(entry_path):
+            try:
+                return(os.path.getmtime(entry_path))
+            except OSError:
+                return(0)
+
+        for entry_path in sorted(entries, key=mtime)[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+
+    def invalidate(self, path):
+        # Drop every entry for path and anything below it, whatever the
+        # credentials or query string
+        for entry_path in self.entries():
+            try:
+                with open(entry_path) as f:
+                    entry_url_path = json.load(f)["path"]
+                if entry_url_path == path or entry_url_path.startswith(path + "/"):
+                    os.remove(entry_path)
+            except (IOError, OSError, ValueError, KeyError):
+                pass
+
+
+def confluent_cache(module):
+    # Returns the response cache for this run.  Writes must invalidate even
+    # when caching is not enabled for this task, so the cache is also
+    # returned whenever its directory already exists.
+    path = module.params.get("api_cache_dir")
+    if not path or not (module.params.get("api_cache") or os.path.isdir(path)):
+        return(None)
+
+    if path not in _CACHES:
+        _CACHES[path] = ConfluentResponseCache(
+            path,
+            ttl=module.params["api_cache_ttl"],
+            max_entries=module.params["api_cache_max_entries"],
+        )
+    return(_CACHES[path])
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# Simplified BSD License (see licenses/simplified_bsd.txt or https://opensource.org/licenses/BSD-2-Clause)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import copy
+import time
+
+from ansible.module_utils._text import to_text
+
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import AnsibleConfluent
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_cache import confluent_cache
+
+# Fields set by Confluent Cloud, never part of a desired state
+SERVER_MANAGED_KEYS = ("api_version", "kind", "id", "metadata")
+
+
+def normalize_value(value):
+    # Canonical form for comparisons: text instead of bytes, floats that are
+    # whole numbers as ints, unset (None) dict values dropped, and lists of
+    # scalars compared regardless of order
+    if isinstance(value, dict):
+        return(dict((to_text(k), normalize_value(v)) for k, v in value.items() if v is not None))
+    if isinstance(value, (list, tuple)):
+        items = [normalize_value(v) for v in value]
+        if all(not isinstance(v, (dict, list)) for v in items):
+            return(sorted(items, key=lambda v: (type(v).__name__, v)))
+        return(items)
+    if isinstance(value, bytes):
+        return(to_text(value, errors="surrogate_or_strict"))
+    if isinstance(value, float) and value.is_integer():
+        return(int(value))
+    return(value)
+
+
+def resource_diff(current, desired, ignore=SERVER_MANAGED_KEYS):
+    # Compares a desired state against the current resource and returns
+    # (patch, diff).  patch is a JSON merge patch holding only what changed,
+    # recursing into nested dicts (lists are replaced as a whole).  Keys
+    # left unset (None) in desired, and the ignored server-managed keys,
+    # never count as changes.  diff is the before/after pair for --diff.
+    patch = dict()
+    before = dict()
+    after = dict()
+    for key, value in desired.items():
+        if value is None or key in ignore:
+            continue
+
+        cur_value = current.get(key)
+        if isinstance(value, dict) and isinstance(cur_value, dict):
+            sub_patch, sub_diff = resource_diff(cur_value, value, ignore=())
+            if sub_patch:
+                patch[key] = sub_patch
+                before[key] = sub_diff["before"]
+                after[key] = sub_diff["after"]
+        elif normalize_value(cur_value) != normalize_value(value):
+            patch[key] = value
+            before[key] = cur_value
+            after[key] = value
+
+    return(patch, dict(before=before, after=after))
+
+
+def resource_exists(resource):
+    # wait_for_state() condition, the resource is visible and done provisioning
+    return(bool(resource) and resource.get("status", {}).get("phase") not in ("PROVISIONING", "PENDING"))
+
+
+def resource_absent(resource):
+    # wait_for_state() condition, the resource is gone
+    return(not resource)
+
+
+class AnsibleConfluentResource(AnsibleConfluent):
+    # AnsibleConfluent plus the write side: create, update, delete and
+    # waiting on the result.  Only modules that change resources import
+    # this, so read-only modules ship and load less code.
+
+    def configure(self):
+        # Writes invalidate cached reads even when caching is off for this task
+        if self.cache is None:
+            self.cache = confluent_cache(self.module)
+
+    def wait_for_state(self, resource_ids, ready, timeout=300, path=None, query=None):
+        # Poll until ready(resource) holds for every id and return the final
+        # resources keyed by id.  A resource that no longer exists is passed
+        # as an empty dict.  A single pending resource is fetched by id,
+        # several pending ones cost one listing per interval (which stops as
+        # soon as all of them are seen).  The interval starts at a second and
+        # grows up to 10s, the module fails once timeout seconds have passed.
+        # query is sent with every poll, e.g. the environment of a cluster.
+        path = path or self.resource_path
+        pending = set(resource_ids)
+        done = dict()
+
+        # Polls must see the live state, not cached responses
+        client = copy.copy(self)
+        client.cache = None
+
+        deadline = time.time() + timeout
+        interval = 1.0
+        while True:
+            if len(pending) == 1:
+                resource_id = list(pending)[0]
+                resources = {resource_id: client.query_by_id(resource_id, path=path, query=query)}
+            else:
+                resources = dict()
+                for resource in client.api_paginate(path=path, query=query):
+                    if resource.get("id") in pending:
+                        resources[resource["id"]] = resource
+                        if len(resources) == len(pending):
+                            break
+
+            for resource_id in list(pending):
+                resource = resources.get(resource_id, dict())
+                if ready(resource):
+                    done[resource_id] = resource
+                    pending.discard(resource_id)
+
+            if not pending:
+                return(done)
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                self.module.fail_json(
+                    msg="Timed out after %ss waiting for %s" % (timeout, ", ".join(sorted(pending))),
+                )
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 1.5, 10)
+
+    def create(self, data):
+        resource = dict()
+
+        if not self.module.check_mode:
+            resource = self.api_query(
+                path=self.resource_path,
+                method="POST",
+                data=data,
+            )
+        resource['changed'] = True
+        if getattr(self.module, "_diff", False):
+            resource['diff'] = dict(before=dict(), after=data)
+        return(resource)
+
+    def update(self, cur_state, target_state):
+        # Only the changed fields are sent, as a merge patch.  PUT resources
+        # get the complete desired state instead.
+        patch, diff = resource_diff(cur_state, target_state)
+        if not patch:
+            resource = dict(cur_state)
+            resource['changed'] = False
+            return(resource)
+
+        resource = dict()
+        if not self.module.check_mode:
+            if self.resource_update_method == "PUT":
+                data = dict((k, v) for k, v in cur_state.items() if k not in SERVER_MANAGED_KEYS)
+                data.update((k, v) for k, v in target_state.items() if v is not None)
+            else:
+                data = patch
+
+            resource = self.api_query(
+                path="%s/%s" % (self.resource_path, self.resource_key_id),
+                method=self.resource_update_method,
+                data=data,
+            )
+
+        resource['changed'] = True
+        if getattr(self.module, "_diff", False):
+            resource['diff'] = diff
+        return(resource)
+
+    def absent(self):
+        if not self.module.check_mode:
+            self.api_query(
+                path="%s/%s" % (self.resource_path, self.resource_key_id),
+                method="DELETE",
+            )
+        return({'changed': True, 'id': self.resource_key_id})
@@ -0,0 +1,180 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+DOCUMENTATION = """
+---
+module: cluster_info
+short_description: Get information on existing Kafka clusters
+description:
+  - Enumerate and filter Kafka clusters across Confluent Cloud environments.
+  - Clusters are listed per environment. Environments are listed once, then their clusters are queried
+    in parallel, up to I(api_concurrency) environments at a time.
+version_added: "0.0.1"
+author: "Keith Resar (@keithresar)"
+extends_documentation_fragment:
+  - confluent.cloud.confluent
+options:
+  environments:
+    description:
+      - List of environment Ids to look in.
+      - All environments of the organization when omitted.
+    type: list
+    elements: str
+  names:
+    description:
+      - List of cluster Names.
+      - Mutually exclusive when used with `ids`
+    type: list
+    elements: str
+  ids:
+    description:
+      - List of cluster Ids.
+      - Mutually exclusive when used with `names`
+    type: list
+    elements: str
+  fields:
+    description:
+      - Only return these attributes of each cluster, e.g. C(spec.display_name) or C(status.phase).
+    type: list
+    elements: str
+  count_only:
+    description: Only return the number of matching clusters as C(count).
+    type: bool
+    default: false
+  output:
+    description:
+      - Shape of the result.
+      - C(dict) returns each cluster as a top level key named after its id.
+      - C(list) returns the clusters as a list under C(clusters), ordered by environment.
+    type: str
+    default: dict
+    choices:
+      - dict
+      - list
+"""
+
+EXAMPLES = """
+- name: List all Kafka clusters of the organization
+  confluent.cloud.cluster_info:
+- name: List the clusters of some environments
+  confluent.cloud.cluster_info:
+    environments:
+      - env-f3a90de
+      - env-3887de0
+- name: Find clusters by name, returning only their id, environment and endpoint
+  confluent.cloud.cluster_info:
+    names:
+      - orders
+    fields:
+      - id
+      - spec.environment.id
+      - spec.kafka_bootstrap_endpoint
+    output: list
+"""
+
+RETURN = """
+---
+count:
+  description: Number of matching clusters
+  returned: when count_only is true
+  type: int
+clusters:
+  description: Dictionary of matching clusters, keyed by cluster id, or a list when I(output=list)
+  returned: success
+  type: dict
+  contains:
+    id:
+      description: Cluster id
+      type: str
+      returned: success
+      sample: lkc-9v5v5
+    spec:
+      description: Cluster specification, including its name, cloud, region and environment
+      type: dict
+      returned: success
+    status:
+      description: Cluster status, including its provisioning phase
+      type: dict
+      returned: success
+    metadata:
+      description: Cluster metadata, including create timestamp and updated timestamp
+      type: dict
+      returned: success
+api_stats:
+  description: Summary of the API calls made by the task
+  type: dict
+  returned: when api_stats is true
+  sample: {"calls": 3, "requests": 4, "retries": 1, "statuses": {"200": 3}, "latency": 0.42, "backoff_time": 1.1}
+profile:
+  description: Wall time, hottest functions and report paths of the profiled task
+  type: dict
+  returned: when api_profile is set
+  sample: {"wall_time": 0.31, "functions": [{"function": "ssl.py:1134(read)", "calls": 12, "tottime": 0.2, "cumtime": 0.2}]}
+"""
+
+import traceback
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_native
+
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import (
+    AnsibleConfluent,
+    confluent_argument_spec,
+    confluent_result,
+    resource_info,
+)
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_cache import confluent_cache
+
+
+def get_clusters_info(module):
+    confluent = AnsibleConfluent(
+        module=module,
+        resource_path="/cmk/v2/clusters",
+        cache=confluent_cache(module),
+    )
+
+    environment_ids = module.params.get('environments')
+    if environment_ids is None:
+        environment_ids = [e['id'] for e in confluent.api_paginate('/org/v2/environments')]
+
+    # One listing per environment, run concurrently
+    listings = confluent.api_query_many([
+        {'path': confluent.resource_path, 'data': {'environment': e}, 'paginate': True} for e in environment_ids])
+
+    clusters = (c for listing in listings for c in listing)
+    return(resource_info(module, clusters, 'clusters', name_field='spec.display_name'))
+
+
+def main():
+    argument_spec = confluent_argument_spec()
+    argument_spec['environments'] = dict(type='list', elements='str')
+    argument_spec['ids'] = dict(type='list', elements='str')
+    argument_spec['names'] = dict(type='list', elements='str')
+    argument_spec['fields'] = dict(type='list', elements='str')
+    argument_spec['count_only'] = dict(type='bool', default=False)
+    argument_spec['output'] = dict(default='dict', choices=['dict', 'list'])
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+        mutually_exclusive=[
+            ('ids', 'names')
+        ]
+    )
+
+    try:
+        module.exit_json(**confluent_result(module, get_clusters_info(module)))
+    except Exception as e:
+        module.fail_json(msg='failed to get cluster info, error: %s' %
+                         (to_native(e)), exception=traceback.format_exc())
+
+
+if __name__ == "__main__":
+    main()
@@ -26,10 +26,57 @@ options:
   name:
     description: Environment name
     type: str
+  environments:
+    description:
+      - Reconcile many environments in one invocation.
+      - Environments are listed once, then the required creates, updates and deletes run in parallel,
+        up to I(api_concurrency) at a time.
+      - Mutually exclusive with I(id) and I(name).
+      - Each environment may only be listed once, by I(id) or by I(name).
+    type: list
+    elements: dict
+    suboptions:
+      id:
+        description: Environment Id
+        type: str
+      name:
+        description: Environment name
+        type: str
+      state:
+        description: Whether this environment should exist.
+        default: present
+        choices:
+          - absent
+          - present
+        type: str
+  wait:
+    description:
+      - Wait until created environments are visible and removed environments are gone before returning.
+      - Several pending environments are checked with a single listing per poll.
+    type: bool
+    default: false
+  wait_timeout:
+    description:
+      - How many seconds to wait when I(wait=true).
+      - Also bounds the wait for clusters removed by I(cascade=true).
+    type: int
+    default: 300
+  cascade:
+    description:
+      - When removing an environment, first remove what it contains, one dependency level at a time.
+      - The API keys of its clusters go first, then the clusters, then the environment itself.
+        Deletes within a level run in parallel, up to I(api_concurrency) at a time, and each level
+        must be gone before the next one starts.
+      - Service accounts belong to the organization rather than to an environment and are kept,
+        only their API keys for the removed clusters are deleted.
+      - In check mode the resources that would be removed are reported without deleting them.
+    type: bool
+    default: false
   state:
     description:
-      - If `absent`, the environment and all objects (clusters, service accounts) will be removed.
-        Note that absent will not cause Environment to fail if the Environment does not exist.
+      - If `absent`, the environment will be removed, together with its clusters and their API keys
+        when I(cascade=true). Note that absent will not cause Environment to fail if the Environment
+        does not exist.
       - If `present`, the environment will be created.
     default: present
     choices:
@@ -47,11 +94,27 @@ EXAMPLES = """
   confluent.cloud.environment:
     name: test_env
     state: absent
+    wait: true
+- name: Tear down an environment with its clusters and API keys
+  confluent.cloud.environment:
+    name: ci_env
+    state: absent
+    cascade: true
+    wait: true
 - name: Modify existing environment by Id
   confluent.cloud.environment:
     id: env-dsh38dja
     name: test_env_new
     state: present
+- name: Reconcile several environments at once
+  confluent.cloud.environment:
+    environments:
+      - name: dev
+      - name: staging
+      - id: env-dsh38dja
+        name: prod
+      - name: scratch
+        state: absent
 """
 
 RETURN = """
@@ -69,36 +132,169 @@ metadata:
   description: Environment metadata, including create timestamp and updated timestamp
   type: dict
   returned: success
+cascade:
+  description: Resources removed ahead of the environment when I(cascade=true)
+  type: dict
+  returned: when cascade is true and the environment is removed
+  contains:
+    api_keys:
+      description: Ids of the removed API keys
+      type: list
+      elements: str
+    clusters:
+      description: Ids of the removed clusters
+      type: list
+      elements: str
+environments:
+  description: Per item results when I(environments) is used, in input order
+  type: list
+  elements: dict
+  returned: when environments is used
+  contains:
+    id:
+      description: Environment id
+      type: str
+    display_name:
+      description: Environment name
+      type: str
+    state:
+      description: Requested state
+      type: str
+    changed:
+      description: Whether this environment was created, updated or removed
+      type: bool
+    failed:
+      description: Set when the API call for this environment failed
+      type: bool
+    cascade:
+      description: Resources removed ahead of the environment when I(cascade=true)
+      type: dict
+    msg:
+      description: Error message for a failed item
+      type: str
+api_stats:
+  description: Summary of the API calls made by the task
+  type: dict
+  returned: when api_stats is true
+  sample: {"calls": 3, "requests": 4, "retries": 1, "statuses": {"200": 3}, "latency": 0.42, "backoff_time": 1.1}
+profile:
+  description: Wall time, hottest functions and report paths of the profiled task
+  type: dict
+  returned: when api_profile is set
+  sample: {"wall_time": 0.31, "functions": [{"function": "ssl.py:1134(read)", "calls": 12, "tottime": 0.2, "cumtime": 0.2}]}
 """
 
 import traceback
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils._text import to_native
 
-from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import AnsibleConfluent, confluent_argument_spec
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import (
+    ConfluentApiError,
+    confluent_argument_spec,
+    confluent_result,
+)
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_resource import (
+    AnsibleConfluentResource,
+    resource_absent,
+    resource_diff,
+    resource_exists,
+)
+
+
+def environment_wait(module, resource_ids, ready):
+    if not module.params.get('wait') or module.check_mode or not resource_ids:
+        return(dict())
+
+    confluent = AnsibleConfluentResource(
+        module=module,
+        resource_path="/org/v2/environments",
+    )
+
+    return(confluent.wait_for_state(resource_ids, ready, timeout=module.params.get('wait_timeout')))
+
+
+def environment_cascade(module, environment_ids):
+    # Removes the contents of the environments ahead of the environments
+    # themselves and returns what was (or in check mode would be) removed,
+    # per environment.  Each dependency level is discovered with one fan-out
+    # of listings and deleted with one fan-out of DELETEs: API keys of the
+    # clusters, then the clusters, whose deprovisioning is awaited.
+    confluent = AnsibleConfluentResource(
+        module=module,
+        resource_path="/cmk/v2/clusters",
+    )
+
+    removed = dict((e, {'api_keys': [], 'clusters': []}) for e in environment_ids)
+    clusters = []
+    listings = confluent.api_query_many([
+        {'path': '/cmk/v2/clusters', 'data': {'environment': e}, 'paginate': True} for e in environment_ids])
+    for environment_id, listing in zip(environment_ids, listings):
+        for cluster in listing:
+            clusters.append((environment_id, cluster['id']))
+            removed[environment_id]['clusters'].append(cluster['id'])
+
+    api_keys = []
+    listings = confluent.api_query_many([
+        {'path': '/iam/v2/api-keys', 'data': {'spec.resource': c}, 'paginate': True} for e, c in clusters])
+    for (environment_id, cluster_id), listing in zip(clusters, listings):
+        for api_key in listing:
+            api_keys.append(api_key['id'])
+            removed[environment_id]['api_keys'].append(api_key['id'])
+
+    if module.check_mode:
+        return(removed)
+
+    confluent.api_query_many([
+        {'path': '/iam/v2/api-keys/%s' % k, 'method': 'DELETE'} for k in api_keys])
+    confluent.api_query_many([
+        {'path': '/cmk/v2/clusters/%s?environment=%s' % (c, e), 'method': 'DELETE'} for e, c in clusters])
+
+    # Clusters deprovision in the background, the environment can only go
+    # once they are gone
+    for environment_id in environment_ids:
+        if removed[environment_id]['clusters']:
+            confluent.wait_for_state(
+                removed[environment_id]['clusters'],
+                resource_absent,
+                timeout=module.params.get('wait_timeout'),
+                query={'environment': environment_id},
+            )
+
+    return(removed)
 
 
 def environment_remove(module, resource_id):
-    confluent = AnsibleConfluent(
+    removed = None
+    if module.params.get('cascade'):
+        removed = environment_cascade(module, [resource_id])[resource_id]
+
+    confluent = AnsibleConfluentResource(
         module=module,
         resource_path="/org/v2/environments",
         resource_key_id=resource_id
     )
 
-    return(confluent.absent())
+    resource = confluent.absent()
+    if removed is not None:
+        resource['cascade'] = removed
+    environment_wait(module, [resource_id], resource_absent)
+    return(resource)
 
 
 def environment_create(module):
-    confluent = AnsibleConfluent(
+    confluent = AnsibleConfluentResource(
         module=module,
         resource_path="/org/v2/environments",
     )
 
-    return(confluent.create({'display_name': module.params.get('name')}))
+    resource = confluent.create({'display_name': module.params.get('name')})
+    if resource.get('id'):
+        environment_wait(module, [resource['id']], resource_exists)
+    return(resource)
 
 
 def environment_update(module, environment):
-    confluent = AnsibleConfluent(
+    confluent = AnsibleConfluentResource(
         module=module,
         resource_path="/org/v2/environments",
         resource_key_id=environment['id']
@@ -109,25 +305,28 @@ def environment_update(module, environment):
     }))
 
 
-def get_environments(module):
-    confluent = AnsibleConfluent(
+def get_environment(module):
+    confluent = AnsibleConfluentResource(
         module=module,
         resource_path="/org/v2/environments",
+        resource_key_name="display_name",
     )
 
-    resources = confluent.query()
-    return(resources['data'])
+    # Direct lookup by id, falling back to an exact name match
+    if module.params.get('id'):
+        environment = confluent.query_by_id(module.params.get('id'))
+        if environment:
+            return(environment)
+
+    if module.params.get('name'):
+        return(confluent.query_by_names([module.params.get('name')]).get(module.params.get('name')))
+
+    return(None)
 
 
 def environment_process(module):
     # Get existing environment if it exists
-    environments = get_environments(module)
-    if module.params.get('id') and len([e for e in environments if e['id'] in module.params.get('id')]):
-        environment = [e for e in environments if e['id'] in module.params.get('id')][0]
-    elif module.params.get('name') and len([e for e in environments if e['display_name'] in module.params.get('name')]):
-        environment = [e for e in environments if e['display_name'] in module.params.get('name')][0]
-    else:
-        environment = None
+    environment = get_environment(module)
 
     # Manage environment removal
     if module.params.get('state') == 'absent' and not environment:
@@ -144,19 +343,122 @@ def environment_process(module):
         return(environment_update(module, environment))
 
 
+def environments_process(module):
+    confluent = AnsibleConfluentResource(
+        module=module,
+        resource_path="/org/v2/environments",
+    )
+
+    # List once and index by id and by name
+    by_id = dict()
+    by_name = dict()
+    for e in confluent.query():
+        by_id[e['id']] = e
+        by_name.setdefault(e['display_name'], e)
+
+    results = []
+    pending = []
+    seen = set()
+    for item in module.params.get('environments'):
+        if item.get('id'):
+            environment = by_id.get(item['id'])
+        else:
+            environment = by_name.get(item['name'])
+
+        # Each environment once, two items for the same one would queue
+        # duplicate creates or conflicting writes
+        key = environment['id'] if environment else item.get('id') or item['name']
+        if key in seen:
+            module.fail_json(msg='Environment %s is listed more than once in environments' % key)
+        seen.add(key)
+
+        result = {'id': item.get('id'), 'display_name': item.get('name'), 'state': item['state'], 'changed': False}
+        if environment:
+            result.update({'id': environment['id'], 'display_name': environment['display_name']})
+        results.append(result)
+
+        # Nothing to do for absent environments that do not exist or present
+        # ones that already match
+        if item['state'] == 'absent' and not environment:
+            continue
+        if item['state'] == 'present' and environment:
+            patch = resource_diff(environment, {'display_name': item.get('name')})[0]
+            if not patch:
+                continue
+        if item['state'] == 'present' and not environment and not item.get('name'):
+            result.update({'failed': True, 'msg': 'Environment %s not found and no name given to create it' % item['id']})
+            continue
+
+        result['changed'] = True
+        if item['state'] == 'absent':
+            request = {'path': '/org/v2/environments/%s' % environment['id'], 'method': 'DELETE'}
+        elif not environment:
+            request = {'path': '/org/v2/environments', 'method': 'POST', 'data': {'display_name': item['name']}}
+        else:
+            request = {'path': '/org/v2/environments/%s' % environment['id'], 'method': 'PATCH', 'data': patch}
+        pending.append((result, request))
+
+    # Empty the removed environments first, all of them level by level
+    if module.params.get('cascade'):
+        removals = [result for result, request in pending if request['method'] == 'DELETE']
+        removed = environment_cascade(module, [result['id'] for result in removals])
+        for result in removals:
+            result['cascade'] = removed[result['id']]
+
+    # Run the writes with bounded concurrency, failures are kept per item
+    if pending and not module.check_mode:
+        responses = confluent.api_query_many([r for result, r in pending], fail_on_error=False)
+        for (result, request), resource in zip(pending, responses):
+            if isinstance(resource, ConfluentApiError):
+                result.update({'changed': False, 'failed': True, 'msg': to_native(resource), 'fetch_url_info': resource.info})
+            elif resource:
+                result.update({'id': resource.get('id', result['id']), 'display_name': resource.get('display_name', result['display_name'])})
+
+        # Batched wait, one listing per poll for all pending environments
+        succeeded = [r for r in results if r['changed'] and not r.get('failed') and r['id']]
+        environment_wait(module, [r['id'] for r in succeeded if r['state'] == 'present'], resource_exists)
+        environment_wait(module, [r['id'] for r in succeeded if r['state'] == 'absent'], resource_absent)
+
+    changed = any(r['changed'] for r in results)
+    if any(r.get('failed') for r in results):
+        module.fail_json(**confluent_result(module, dict(
+            msg='failed to reconcile some environments', changed=changed, environments=results)))
+
+    return({'changed': changed, 'environments': results})
+
+
 def main():
     argument_spec = confluent_argument_spec()
     argument_spec['id'] = dict(type='str')
     argument_spec['name'] = dict(type='str')
     argument_spec['state'] = dict(default='present', choices=['present', 'absent'])
+    argument_spec['wait'] = dict(type='bool', default=False)
+    argument_spec['wait_timeout'] = dict(type='int', default=300)
+    argument_spec['cascade'] = dict(type='bool', default=False)
+    argument_spec['environments'] = dict(
+        type='list',
+        elements='dict',
+        options=dict(
+            id=dict(type='str'),
+            name=dict(type='str'),
+            state=dict(default='present', choices=['present', 'absent']),
+        ),
+        required_one_of=[('id', 'name')],
+    )
 
     module = AnsibleModule(
         argument_spec=argument_spec,
         supports_check_mode=True,
+        mutually_exclusive=[
+            ('environments', 'id'),
+            ('environments', 'name'),
+        ]
     )
 
     try:
-        module.exit_json(**environment_process(module))
+        if module.params.get('environments') is not None:
+            module.exit_json(**confluent_result(module, environments_process(module)))
+        module.exit_json(**confluent_result(module, environment_process(module)))
     except Exception as e:
         module.fail_json(msg='failed to get environment, error: %s' %
                          (to_native(e)), exception=traceback.format_exc())
@@ -32,6 +32,26 @@ options:
       - Mutually exclusive when used with `names`
     type: list
     elements: str
+  fields:
+    description:
+      - Only return these attributes of each environment, e.g. C(display_name) or C(metadata.created_at).
+      - Environments are projected as pages arrive, so unrequested attributes are never held in memory.
+    type: list
+    elements: str
+  count_only:
+    description: Only return the number of matching environments as C(count).
+    type: bool
+    default: false
+  output:
+    description:
+      - Shape of the result.
+      - C(dict) returns each environment as a top level key named after its id.
+      - C(list) returns the environments as a list under C(environments), in API order.
+    type: str
+    default: dict
+    choices:
+      - dict
+      - list
 """
 
 EXAMPLES = """
@@ -47,12 +67,25 @@ EXAMPLES = """
     names:
       - Test
       - Production
+- name: List only environment ids and names, as a list
+  confluent.cloud.environment_info:
+    fields:
+      - id
+      - display_name
+    output: list
+- name: Count environments
+  confluent.cloud.environment_info:
+    count_only: true
 """
 
 RETURN = """
 ---
+count:
+  description: Number of matching environments
+  returned: when count_only is true
+  type: int
 environments:
-  description: Dictionary of matching envrionments, keyed by environment id
+  description: Dictionary of matching envrionments, keyed by environment id, or a list when I(output=list)
   returned: success
   type: dict
   contains:
@@ -69,37 +102,48 @@ environments:
       description: Environment metadata, including create timestamp and updated timestamp
       type: dict
       returned: success
+api_stats:
+  description: Summary of the API calls made by the task
+  type: dict
+  returned: when api_stats is true
+  sample: {"calls": 3, "requests": 4, "retries": 1, "statuses": {"200": 3}, "latency": 0.42, "backoff_time": 1.1}
+profile:
+  description: Wall time, hottest functions and report paths of the profiled task
+  type: dict
+  returned: when api_profile is set
+  sample: {"wall_time": 0.31, "functions": [{"function": "ssl.py:1134(read)", "calls": 12, "tottime": 0.2, "cumtime": 0.2}]}
 """
 
 import traceback
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils._text import to_native
 
-from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import AnsibleConfluent, confluent_argument_spec
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import (
+    AnsibleConfluent,
+    confluent_argument_spec,
+    confluent_result,
+    resource_info,
+)
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_cache import confluent_cache
 
 
 def get_environments_info(module):
     confluent = AnsibleConfluent(
         module=module,
         resource_path="/org/v2/environments",
+        cache=confluent_cache(module),
     )
 
-    resources = confluent.query()
-
-    if module.params.get('ids'):
-        environments = [e for e in resources['data'] if e['id'] in module.params.get('ids')]
-    elif module.params.get('names'):
-        environments = [e for e in resources['data'] if e['display_name'] in module.params.get('names')]
-    else:
-        environments = resources['data']
-
-    return({e['id']: e for e in environments})
+    return(resource_info(module, confluent.query(), 'environments'))
 
 
 def main():
     argument_spec = confluent_argument_spec()
     argument_spec['ids'] = dict(type='list', elements='str')
     argument_spec['names'] = dict(type='list', elements='str')
+    argument_spec['fields'] = dict(type='list', elements='str')
+    argument_spec['count_only'] = dict(type='bool', default=False)
+    argument_spec['output'] = dict(default='dict', choices=['dict', 'list'])
 
     module = AnsibleModule(
         argument_spec=argument_spec,
@@ -110,7 +154,7 @@ def main():
     )
 
     try:
-        module.exit_json(**get_environments_info(module))
+        module.exit_json(**confluent_result(module, get_environments_info(module)))
     except Exception as e:
         module.fail_json(msg='failed to get environment info, error: %s' %
                          (to_native(e)), exception=traceback.format_exc())
@@ -0,0 +1,286 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+DOCUMENTATION = """
+---
+module: export
+short_description: Export Confluent Cloud resources to a JSON Lines snapshot
+description:
+  - Streams environments, Kafka clusters and service accounts into a snapshot file in JSON Lines format.
+  - The first run writes every resource and reports all of them as created. Later runs read the previous
+    snapshot and append only what was created, changed (a different C(metadata.updated_at)) or deleted
+    since, and report that delta.
+  - Every run ends with a commit line, an interrupted run leaves no partial state behind.
+  - The file is written on the host the module runs on, use C(delegate_to) to keep it on the controller.
+version_added: "0.0.1"
+author: "Keith Resar (@keithresar)"
+extends_documentation_fragment:
+  - confluent.cloud.confluent
+options:
+  path:
+    description: Snapshot file
+    type: path
+    required: true
+  resources:
+    description:
+      - Resource types to export.
+      - Clusters are listed per environment, in parallel up to I(api_concurrency) at a time.
+    type: list
+    elements: str
+    default:
+      - environments
+    choices:
+      - environments
+      - clusters
+      - service_accounts
+  compact:
+    description:
+      - Rewrite the snapshot with the current state only, dropping the history of earlier runs.
+      - The delta against the previous snapshot is reported all the same.
+      - Resource types not listed in I(resources) are dropped from the snapshot.
+    type: bool
+    default: false
+"""
+
+EXAMPLES = """
+- name: Nightly snapshot of the organization
+  confluent.cloud.export:
+    path: /var/lib/confluent/org.jsonl
+    resources:
+      - environments
+      - clusters
+      - service_accounts
+  delegate_to: localhost
+  register: snapshot
+
+- name: Report drift
+  ansible.builtin.debug:
+    var: snapshot.delta
+  when: snapshot.changed
+"""
+
+RETURN = """
+---
+path:
+  description: Snapshot file
+  type: str
+  returned: always
+full:
+  description: Whether the whole snapshot was (re)written rather than appended to
+  type: bool
+  returned: always
+delta:
+  description: Ids created, changed and deleted since the previous snapshot, per resource type
+  type: dict
+  returned: always
+  sample: {"environments": {"created": ["env-a1b2c"], "changed": [], "deleted": ["env-x9y8z"]}}
+total:
+  description: Number of resources of each type in the snapshot
+  type: dict
+  returned: always
+  sample: {"environments": 42}
+api_stats:
+  description: Summary of the API calls made by the task
+  type: dict
+  returned: when api_stats is true
+  sample: {"calls": 3, "requests": 4, "retries": 1, "statuses": {"200": 3}, "latency": 0.42, "backoff_time": 1.1}
+profile:
+  description: Wall time, hottest functions and report paths of the profiled task
+  type: dict
+  returned: when api_profile is set
+  sample: {"wall_time": 0.31, "functions": [{"function": "ssl.py:1134(read)", "calls": 12, "tottime": 0.2, "cumtime": 0.2}]}
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+import traceback
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_bytes, to_native, to_text
+
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import (
+    AnsibleConfluent,
+    confluent_argument_spec,
+    confluent_result,
+)
+
+# Snapshot record kind per resource type
+KINDS = {
+    'environments': 'environment',
+    'clusters': 'cluster',
+    'service_accounts': 'service_account',
+}
+
+
+def snapshot_line(record):
+    return(json.dumps(record, sort_keys=True, separators=(',', ':')) + '\n')
+
+
+def snapshot_version(resource):
+    # metadata.updated_at when the API provides it, a digest otherwise
+    updated_at = resource.get('metadata', {}).get('updated_at')
+    if updated_at:
+        return(updated_at)
+    return(hashlib.sha1(to_bytes(snapshot_line(resource))).hexdigest())
+
+
+def snapshot_read(path):
+    # Replays the snapshot into {(kind, id): version} and returns it with
+    # the file offset just past the last commit line.  Records only count
+    # once their commit has been written, anything after the last commit
+    # is the leftover of an interrupted run and gets overwritten.
+    if not os.path.exists(path):
+        return(None, 0)
+
+    state = dict()
+    pending = []
+    offset = committed = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            offset += len(line)
+            try:
+                record = json.loads(to_text(line))
+            except ValueError:
+                break
+            if record['op'] != 'commit':
+                pending.append((record['op'], record['kind'], record['id'], record.get('version')))
+                continue
+            for op, kind, resource_id, version in pending:
+                if op == 'put':
+                    state[(kind, resource_id)] = version
+                else:
+                    state.pop((kind, resource_id), None)
+            pending = []
+            committed = offset
+    return(state, committed)
+
+
+def snapshot_resources(module):
+    # Generator over (kind, resource) for every exported resource type
+    confluent = AnsibleConfluent(
+        module=module,
+        resource_path="/org/v2/environments",
+    )
+    resources = module.params.get('resources')
+
+    environment_ids = []
+    if 'environments' in resources or 'clusters' in resources:
+        for environment in confluent.query():
+            environment_ids.append(environment['id'])
+            if 'environments' in resources:
+                yield('environment', environment)
+
+    if 'clusters' in resources:
+        listings = confluent.api_query_many([
+            {'path': '/cmk/v2/clusters', 'data': {'environment': e}, 'paginate': True} for e in environment_ids])
+        for listing in listings:
+            for cluster in listing:
+                yield('cluster', cluster)
+
+    if 'service_accounts' in resources:
+        for account in confluent.api_paginate('/iam/v2/service-accounts'):
+            yield('service_account', account)
+
+
+def export_process(module):
+    path = module.params.get('path')
+    previous, committed = snapshot_read(path)
+    full = previous is None or module.params.get('compact')
+
+    delta = dict((t, {'created': [], 'changed': [], 'deleted': []}) for t in module.params.get('resources'))
+    total = dict((t, 0) for t in module.params.get('resources'))
+    types = dict((k, t) for t, k in KINDS.items())
+
+    # Records go to a temporary file next to the snapshot first, which then
+    # replaces it (full) or is appended to it (delta)
+    out = None
+    if not module.check_mode:
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.%s.' % os.path.basename(path))
+        out = os.fdopen(fd, 'w')
+
+    try:
+        seen = set()
+        for kind, resource in snapshot_resources(module):
+            key = (kind, resource['id'])
+            version = snapshot_version(resource)
+            seen.add(key)
+            total[types[kind]] += 1
+
+            known = previous.get(key) if previous is not None else None
+            if known is None:
+                delta[types[kind]]['created'].append(resource['id'])
+            elif known != version:
+                delta[types[kind]]['changed'].append(resource['id'])
+            elif not full:
+                continue
+
+            if out:
+                out.write(snapshot_line({'op': 'put', 'kind': kind, 'id': resource['id'], 'version': version, 'data': resource}))
+
+        for kind, resource_id in sorted(set(previous or ()) - seen):
+            if types.get(kind) not in delta:
+                continue
+            delta[types[kind]]['deleted'].append(resource_id)
+            if out and not full:
+                out.write(snapshot_line({'op': 'delete', 'kind': kind, 'id': resource_id}))
+
+        changed = full or any(ids for d in delta.values() for ids in d.values())
+        if out:
+            if changed:
+                counts = dict((action, sum(len(d[action]) for d in delta.values())) for action in ('created', 'changed', 'deleted'))
+                out.write(snapshot_line(dict(counts, op='commit', time=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))))
+            out.close()
+            out = None
+
+            if full:
+                os.rename(tmp_path, path)
+            elif changed:
+                with open(tmp_path, 'rb') as src:
+                    with open(path, 'r+b') as dst:
+                        dst.truncate(committed)
+                        dst.seek(committed)
+                        for line in src:
+                            dst.write(line)
+    finally:
+        if out:
+            out.close()
+        if not module.check_mode and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return({'changed': changed, 'path': path, 'full': full, 'delta': delta, 'total': total})
+
+
+def main():
+    argument_spec = confluent_argument_spec()
+    argument_spec['path'] = dict(type='path', required=True)
+    argument_spec['resources'] = dict(type='list', elements='str', default=['environments'],
+                                      choices=['environments', 'clusters', 'service_accounts'])
+    argument_spec['compact'] = dict(type='bool', default=False)
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    try:
+        module.exit_json(**confluent_result(module, export_process(module)))
+    except Exception as e:
+        module.fail_json(msg='failed to export, error: %s' %
+                         (to_native(e)), exception=traceback.format_exc())
+
+
+if __name__ == "__main__":
+    main()
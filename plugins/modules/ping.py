@@ -33,11 +33,21 @@ ping:
   returned: success
   type: str
   sample: pong
+api_stats:
+  description: Summary of the API calls made by the task
+  type: dict
+  returned: when api_stats is true
+  sample: {"calls": 3, "requests": 4, "retries": 1, "statuses": {"200": 3}, "latency": 0.42, "backoff_time": 1.1}
+profile:
+  description: Wall time, hottest functions and report paths of the profiled task
+  type: dict
+  returned: when api_profile is set
+  sample: {"wall_time": 0.31, "functions": [{"function": "ssl.py:1134(read)", "calls": 12, "tottime": 0.2, "cumtime": 0.2}]}
 """
 
 from ansible.module_utils.basic import AnsibleModule
 
-from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import AnsibleConfluent, confluent_argument_spec
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import AnsibleConfluent, confluent_argument_spec, confluent_result
 
 
 def main():
@@ -53,10 +63,11 @@ def main():
         resource_path="/org/v2/environments",
     )
 
-    resources = confluent.query()
+    # A single one-item page is enough to verify connectivity and auth
+    resources = confluent.api_query(path=confluent.resource_path, data={'page_size': 1})
 
     if 'kind' in resources and resources['kind'] == 'EnvironmentList':
-        confluent.module.exit_json(changed=False, ping="pong")
+        confluent.module.exit_json(**confluent_result(module, dict(changed=False, ping="pong")))
     else:
         module.fail_json(
             msg='Ping failure',
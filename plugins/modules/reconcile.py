@@ -0,0 +1,461 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+DOCUMENTATION = """
+---
+module: reconcile
+short_description: Reconcile a Confluent Cloud organization with a desired state
+description:
+  - Brings environments, their Kafka clusters and service accounts in line with a single desired-state document.
+  - Every resource type is read once, environments and service accounts with one listing each and
+    clusters with one listing per environment, run in parallel.
+  - The differences become a plan of minimal creates, updates and deletes, ordered by dependency.
+    Environments and service accounts come first, then the clusters inside the environments,
+    then environment deletes once their clusters are gone.
+  - Steps of the same level run in parallel, up to I(api_concurrency) at a time.
+  - In check mode the plan is returned without being applied.
+version_added: "0.0.1"
+author: "Keith Resar (@keithresar)"
+extends_documentation_fragment:
+  - confluent.cloud.confluent
+options:
+  environments:
+    description:
+      - Desired environments, matched by I(id) when given and otherwise by name.
+      - Environments are not managed when omitted.
+    type: list
+    elements: dict
+    suboptions:
+      id:
+        description: Environment Id, set to rename an existing environment.
+        type: str
+      name:
+        description: Environment name
+        type: str
+        required: true
+      clusters:
+        description:
+          - Desired Kafka clusters of the environment, matched by name.
+          - The clusters of this environment are not managed when omitted.
+        type: list
+        elements: dict
+        suboptions:
+          name:
+            description: Cluster name
+            type: str
+            required: true
+          cloud:
+            description: Cloud provider
+            type: str
+            required: true
+            choices:
+              - AWS
+              - AZURE
+              - GCP
+          region:
+            description: Cloud provider region, e.g. C(us-west-2)
+            type: str
+            required: true
+          availability:
+            description: Zone availability of the cluster
+            type: str
+            default: SINGLE_ZONE
+            choices:
+              - SINGLE_ZONE
+              - MULTI_ZONE
+          type:
+            description: Cluster type
+            type: str
+            default: Basic
+            choices:
+              - Basic
+              - Standard
+              - Enterprise
+  service_accounts:
+    description:
+      - Desired service accounts, matched by name.
+      - Service accounts are not managed when omitted.
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description: Service account name
+        type: str
+        required: true
+      description:
+        description: Service account description
+        type: str
+  prune:
+    description:
+      - Delete managed resources that are not in the desired state.
+      - Environments missing from I(environments) are deleted together with their clusters, clusters
+        missing from the I(clusters) of an environment are deleted, and so are service accounts missing
+        from I(service_accounts).
+      - Resource types that are omitted are never pruned.
+    type: bool
+    default: false
+  wait_timeout:
+    description: How many seconds to wait for deleted clusters to be gone before deleting their environment.
+    type: int
+    default: 300
+"""
+
+EXAMPLES = """
+- name: Reconcile the organization
+  confluent.cloud.reconcile:
+    environments:
+      - name: prod
+        clusters:
+          - name: orders
+            cloud: AWS
+            region: us-west-2
+            availability: MULTI_ZONE
+            type: Standard
+      - name: dev
+        clusters: []
+    service_accounts:
+      - name: orders-app
+        description: Orders service
+    prune: true
+
+- name: Show the plan only
+  confluent.cloud.reconcile:
+    environments: "{{ confluent_org.environments }}"
+  check_mode: true
+  register: plan
+"""
+
+RETURN = """
+---
+plan:
+  description: Planned steps in execution order, with their outcome when applied
+  type: list
+  elements: dict
+  returned: always
+  contains:
+    action:
+      description: One of C(create), C(update) or C(delete)
+      type: str
+    type:
+      description: One of C(environment), C(cluster) or C(service_account)
+      type: str
+    name:
+      description: Resource name
+      type: str
+    id:
+      description: Resource id, known for existing and created resources
+      type: str
+    environment:
+      description: Environment name, for clusters
+      type: str
+    environment_id:
+      description: Environment id, for clusters. Set once the environment is created for clusters of new environments.
+      type: str
+    level:
+      description: Dependency level, steps of a level run in parallel after the previous level
+      type: int
+    data:
+      description: Request body for creates, merge patch for updates
+      type: dict
+    failed:
+      description: Set when the step failed or was skipped because a step it depends on failed
+      type: bool
+    msg:
+      description: Error message for a failed step
+      type: str
+  sample: [{"action": "create", "type": "environment", "name": "dev", "level": 0, "data": {"display_name": "dev"}}]
+summary:
+  description: Number of planned steps per action
+  type: dict
+  returned: always
+  sample: {"create": 2, "update": 1, "delete": 0}
+api_stats:
+  description: Summary of the API calls made by the task
+  type: dict
+  returned: when api_stats is true
+  sample: {"calls": 3, "requests": 4, "retries": 1, "statuses": {"200": 3}, "latency": 0.42, "backoff_time": 1.1}
+profile:
+  description: Wall time, hottest functions and report paths of the profiled task
+  type: dict
+  returned: when api_profile is set
+  sample: {"wall_time": 0.31, "functions": [{"function": "ssl.py:1134(read)", "calls": 12, "tottime": 0.2, "cumtime": 0.2}]}
+"""
+
+import traceback
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_native
+
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import (
+    ConfluentApiError,
+    confluent_argument_spec,
+    confluent_result,
+)
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_resource import (
+    AnsibleConfluentResource,
+    resource_absent,
+    resource_diff,
+)
+
+# Steps of a level only start once the previous level is done
+LEVEL_ENVIRONMENTS = 0
+LEVEL_CLUSTERS = 1
+LEVEL_REMOVALS = 2
+
+
+def cluster_spec(cluster):
+    return({
+        'display_name': cluster['name'],
+        'cloud': cluster['cloud'],
+        'region': cluster['region'],
+        'availability': cluster['availability'],
+        'config': {'kind': cluster['type']},
+    })
+
+
+def reconcile_read(module, confluent):
+    # Current state of every managed resource type: one listing per type,
+    # then one cluster listing per environment, each batch in parallel
+    managed = []
+    if module.params.get('environments') is not None:
+        managed.append(('environments', '/org/v2/environments'))
+    if module.params.get('service_accounts') is not None:
+        managed.append(('service_accounts', '/iam/v2/service-accounts'))
+
+    listings = confluent.api_query_many([{'path': path, 'paginate': True} for key, path in managed])
+    current = dict(environments=[], service_accounts=[], clusters=dict())
+    for (key, path), listing in zip(managed, listings):
+        current[key] = listing
+
+    # Clusters of environments whose clusters are managed, or which will be
+    # pruned together with their clusters
+    wanted = dict((e['id'] or e['name'], e) for e in module.params.get('environments') or [])
+    environment_ids = []
+    for environment in current['environments']:
+        desired = wanted.get(environment['id']) or wanted.get(environment['display_name'])
+        if (desired and desired.get('clusters') is not None) or (not desired and module.params.get('prune')):
+            environment_ids.append(environment['id'])
+
+    listings = confluent.api_query_many([
+        {'path': '/cmk/v2/clusters', 'data': {'environment': e}, 'paginate': True} for e in environment_ids])
+    for environment_id, listing in zip(environment_ids, listings):
+        current['clusters'][environment_id] = listing
+
+    return(current)
+
+
+def reconcile_plan(module, current):
+    # Minimal steps taking current to the desired state, ordered by level
+    prune = module.params.get('prune')
+    plan = []
+
+    if module.params.get('environments') is not None:
+        by_id = dict((e['id'], e) for e in current['environments'])
+        by_name = dict()
+        for e in current['environments']:
+            by_name.setdefault(e['display_name'], e)
+
+        seen = set()
+        for desired in module.params.get('environments'):
+            environment = by_id.get(desired['id']) if desired.get('id') else by_name.get(desired['name'])
+            if not environment:
+                plan.append({'action': 'create', 'type': 'environment', 'name': desired['name'], 'level': LEVEL_ENVIRONMENTS,
+                             'data': {'display_name': desired['name']}})
+            else:
+                seen.add(environment['id'])
+                patch = resource_diff(environment, {'display_name': desired['name']})[0]
+                if patch:
+                    plan.append({'action': 'update', 'type': 'environment', 'name': desired['name'], 'id': environment['id'],
+                                 'level': LEVEL_ENVIRONMENTS, 'data': patch})
+
+            if desired.get('clusters') is None:
+                continue
+
+            clusters = dict()
+            for c in current['clusters'].get(environment['id'], []) if environment else []:
+                clusters.setdefault(c['spec']['display_name'], c)
+
+            for cluster in desired['clusters']:
+                step = {'type': 'cluster', 'name': cluster['name'], 'environment': desired['name'],
+                        'environment_id': environment['id'] if environment else None, 'level': LEVEL_CLUSTERS}
+                existing = clusters.pop(cluster['name'], None)
+                if not existing:
+                    step.update(action='create', data={'spec': cluster_spec(cluster)})
+                    plan.append(step)
+                    continue
+                patch = resource_diff(existing['spec'], cluster_spec(cluster), ignore=())[0]
+                if patch:
+                    step.update(action='update', id=existing['id'], data={'spec': patch})
+                    plan.append(step)
+
+            if prune:
+                for name, existing in sorted(clusters.items()):
+                    plan.append({'action': 'delete', 'type': 'cluster', 'name': name, 'id': existing['id'],
+                                 'environment': desired['name'], 'environment_id': environment['id'], 'level': LEVEL_CLUSTERS})
+
+        if prune:
+            for environment in current['environments']:
+                if environment['id'] in seen:
+                    continue
+                for cluster in current['clusters'].get(environment['id'], []):
+                    plan.append({'action': 'delete', 'type': 'cluster', 'name': cluster['spec']['display_name'], 'id': cluster['id'],
+                                 'environment': environment['display_name'], 'environment_id': environment['id'],
+                                 'level': LEVEL_CLUSTERS})
+                plan.append({'action': 'delete', 'type': 'environment', 'name': environment['display_name'], 'id': environment['id'],
+                             'level': LEVEL_REMOVALS})
+
+    if module.params.get('service_accounts') is not None:
+        accounts = dict()
+        for a in current['service_accounts']:
+            accounts.setdefault(a['display_name'], a)
+
+        for desired in module.params.get('service_accounts'):
+            existing = accounts.pop(desired['name'], None)
+            if not existing:
+                data = {'display_name': desired['name'], 'description': desired.get('description') or ''}
+                plan.append({'action': 'create', 'type': 'service_account', 'name': desired['name'], 'level': LEVEL_ENVIRONMENTS, 'data': data})
+                continue
+            patch = resource_diff(existing, {'description': desired.get('description')})[0]
+            if patch:
+                plan.append({'action': 'update', 'type': 'service_account', 'name': desired['name'], 'id': existing['id'],
+                             'level': LEVEL_ENVIRONMENTS, 'data': patch})
+
+        if prune:
+            for name, existing in sorted(accounts.items()):
+                plan.append({'action': 'delete', 'type': 'service_account', 'name': name, 'id': existing['id'], 'level': LEVEL_ENVIRONMENTS})
+
+    # Stable sort, steps keep document order within a level
+    plan.sort(key=lambda step: step['level'])
+    return(plan)
+
+
+def step_request(step):
+    path = {
+        'environment': '/org/v2/environments',
+        'cluster': '/cmk/v2/clusters',
+        'service_account': '/iam/v2/service-accounts',
+    }[step['type']]
+
+    data = step.get('data')
+    if step['type'] == 'cluster':
+        environment_id = step['environment_id']
+        if data:
+            data = {'spec': dict(data['spec'], environment={'id': environment_id})}
+        if step['action'] != 'create':
+            path = '%s/%s?environment=%s' % (path, step['id'], environment_id)
+    elif step['action'] != 'create':
+        path = '%s/%s' % (path, step['id'])
+
+    method = {'create': 'POST', 'update': 'PATCH', 'delete': 'DELETE'}[step['action']]
+    return({'path': path, 'method': method, 'data': data})
+
+
+def reconcile_apply(module, confluent, plan):
+    # Runs the plan level by level, failures are kept per step and the
+    # clusters of a failed environment are skipped.  Cluster steps carry the
+    # id of the environment the plan matched, names may not be unique.
+    for level in (LEVEL_ENVIRONMENTS, LEVEL_CLUSTERS, LEVEL_REMOVALS):
+        steps = []
+        for step in plan:
+            if step['level'] != level:
+                continue
+            if step['type'] == 'cluster' and not step['environment_id']:
+                step.update(failed=True, msg='Skipped, environment %s is not available' % step['environment'])
+                continue
+            steps.append(step)
+
+        # Environments are only deleted once their clusters are gone
+        if level == LEVEL_REMOVALS:
+            for step in steps:
+                if step['type'] != 'environment':
+                    continue
+                deleted = [s['id'] for s in plan if s['type'] == 'cluster' and s['action'] == 'delete'
+                           and s['environment_id'] == step['id'] and not s.get('failed')]
+                if deleted:
+                    confluent.wait_for_state(deleted, resource_absent, path='/cmk/v2/clusters',
+                                             timeout=module.params.get('wait_timeout'), query={'environment': step['id']})
+
+        responses = confluent.api_query_many([step_request(s) for s in steps], fail_on_error=False)
+        for step, resource in zip(steps, responses):
+            if isinstance(resource, ConfluentApiError):
+                step.update(failed=True, msg=to_native(resource), fetch_url_info=resource.info)
+            elif resource and resource.get('id'):
+                step['id'] = resource['id']
+                # Clusters of a new environment learn its id
+                if step['type'] == 'environment' and step['action'] == 'create':
+                    for s in plan:
+                        if s['type'] == 'cluster' and s['environment_id'] is None and s['environment'] == step['name']:
+                            s['environment_id'] = resource['id']
+
+
+def reconcile_process(module):
+    confluent = AnsibleConfluentResource(
+        module=module,
+        resource_path="/org/v2/environments",
+    )
+
+    current = reconcile_read(module, confluent)
+    plan = reconcile_plan(module, current)
+    if plan and not module.check_mode:
+        reconcile_apply(module, confluent, plan)
+
+    summary = dict((action, len([s for s in plan if s['action'] == action])) for action in ('create', 'update', 'delete'))
+    result = {'changed': bool(plan), 'plan': plan, 'summary': summary}
+    if any(s.get('failed') for s in plan):
+        module.fail_json(**confluent_result(module, dict(result, msg='failed to apply some steps of the plan')))
+    return(result)
+
+
+def main():
+    argument_spec = confluent_argument_spec()
+    argument_spec['environments'] = dict(
+        type='list',
+        elements='dict',
+        options=dict(
+            id=dict(type='str'),
+            name=dict(type='str', required=True),
+            clusters=dict(
+                type='list',
+                elements='dict',
+                options=dict(
+                    name=dict(type='str', required=True),
+                    cloud=dict(type='str', required=True, choices=['AWS', 'AZURE', 'GCP']),
+                    region=dict(type='str', required=True),
+                    availability=dict(type='str', default='SINGLE_ZONE', choices=['SINGLE_ZONE', 'MULTI_ZONE']),
+                    type=dict(type='str', default='Basic', choices=['Basic', 'Standard', 'Enterprise']),
+                ),
+            ),
+        ),
+    )
+    argument_spec['service_accounts'] = dict(
+        type='list',
+        elements='dict',
+        options=dict(
+            name=dict(type='str', required=True),
+            description=dict(type='str'),
+        ),
+    )
+    argument_spec['prune'] = dict(type='bool', default=False)
+    argument_spec['wait_timeout'] = dict(type='int', default=300)
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    try:
+        module.exit_json(**confluent_result(module, reconcile_process(module)))
+    except Exception as e:
+        module.fail_json(msg='failed to reconcile, error: %s' %
+                         (to_native(e)), exception=traceback.format_exc())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+DOCUMENTATION = """
+---
+module: service_account_info
+short_description: Get information on existing service accounts
+description:
+  - Enumerate and filter service accounts within Confluent Cloud.
+  - Service accounts belong to the organization rather than to an environment, they are all
+    returned by a single paged listing.
+version_added: "0.0.1"
+author: "Keith Resar (@keithresar)"
+extends_documentation_fragment:
+  - confluent.cloud.confluent
+options:
+  names:
+    description:
+      - List of service account Names.
+      - Mutually exclusive when used with `ids`
+    type: list
+    elements: str
+  ids:
+    description:
+      - List of service account Ids.
+      - Mutually exclusive when used with `names`
+    type: list
+    elements: str
+  fields:
+    description:
+      - Only return these attributes of each service account, e.g. C(display_name) or C(metadata.created_at).
+      - Service accounts are projected as pages arrive, so unrequested attributes are never held in memory.
+    type: list
+    elements: str
+  count_only:
+    description: Only return the number of matching service accounts as C(count).
+    type: bool
+    default: false
+  output:
+    description:
+      - Shape of the result.
+      - C(dict) returns each service account as a top level key named after its id.
+      - C(list) returns the service accounts as a list under C(service_accounts), in API order.
+    type: str
+    default: dict
+    choices:
+      - dict
+      - list
+"""
+
+EXAMPLES = """
+- name: List all service accounts
+  confluent.cloud.service_account_info:
+- name: List service accounts that match the given Names
+  confluent.cloud.service_account_info:
+    names:
+      - orders-app
+      - billing-app
+- name: Count service accounts
+  confluent.cloud.service_account_info:
+    count_only: true
+"""
+
+RETURN = """
+---
+count:
+  description: Number of matching service accounts
+  returned: when count_only is true
+  type: int
+service_accounts:
+  description: Dictionary of matching service accounts, keyed by id, or a list when I(output=list)
+  returned: success
+  type: dict
+  contains:
+    id:
+      description: Service account id
+      type: str
+      returned: success
+      sample: sa-9v5v5
+    display_name:
+      description: Service account name
+      type: str
+      returned: success
+    description:
+      description: Service account description
+      type: str
+      returned: success
+    metadata:
+      description: Service account metadata, including create timestamp and updated timestamp
+      type: dict
+      returned: success
+api_stats:
+  description: Summary of the API calls made by the task
+  type: dict
+  returned: when api_stats is true
+  sample: {"calls": 3, "requests": 4, "retries": 1, "statuses": {"200": 3}, "latency": 0.42, "backoff_time": 1.1}
+profile:
+  description: Wall time, hottest functions and report paths of the profiled task
+  type: dict
+  returned: when api_profile is set
+  sample: {"wall_time": 0.31, "functions": [{"function": "ssl.py:1134(read)", "calls": 12, "tottime": 0.2, "cumtime": 0.2}]}
+"""
+
+import traceback
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_native
+
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import (
+    AnsibleConfluent,
+    confluent_argument_spec,
+    confluent_result,
+    resource_info,
+)
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_cache import confluent_cache
+
+
+def get_service_accounts_info(module):
+    confluent = AnsibleConfluent(
+        module=module,
+        resource_path="/iam/v2/service-accounts",
+        cache=confluent_cache(module),
+    )
+
+    return(resource_info(module, confluent.query(), 'service_accounts'))
+
+
+def main():
+    argument_spec = confluent_argument_spec()
+    argument_spec['ids'] = dict(type='list', elements='str')
+    argument_spec['names'] = dict(type='list', elements='str')
+    argument_spec['fields'] = dict(type='list', elements='str')
+    argument_spec['count_only'] = dict(type='bool', default=False)
+    argument_spec['output'] = dict(default='dict', choices=['dict', 'list'])
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+        mutually_exclusive=[
+            ('ids', 'names')
+        ]
+    )
+
+    try:
+        module.exit_json(**confluent_result(module, get_service_accounts_info(module)))
+    except Exception as e:
+        module.fail_json(msg='failed to get service account info, error: %s' %
+                         (to_native(e)), exception=traceback.format_exc())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+
+from ansible.errors import AnsibleError
+from ansible.module_utils.parsing.convert_bool import boolean
+
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import confluent_argument_spec
+
+
+class ConfluentPluginModule:
+    # Minimal stand-in for AnsibleModule so controller-side plugins
+    # (inventory, lookup) can drive AnsibleConfluent.  Parameters not given
+    # by the plugin come from the CONFLUENT_* environment variables and the
+    # defaults of confluent_argument_spec(), like they would for a module.
+
+    check_mode = False
+
+    def __init__(self, params):
+        self.params = dict()
+        for key, spec in confluent_argument_spec().items():
+            value = params.get(key)
+            if value is None and spec.get("fallback"):
+                for env in spec["fallback"][1]:
+                    if env in os.environ:
+                        value = os.environ[env]
+                        break
+            if value is None:
+                value = spec.get("default")
+            self.params[key] = self.convert(value, spec.get("type", "str"))
+
+        if not self.params.get("api_key") or not self.params.get("api_secret"):
+            raise AnsibleError("Confluent Cloud api_key and api_secret are required")
+
+    def convert(self, value, value_type):
+        if value is None:
+            return(None)
+        if value_type == "int":
+            return(int(value))
+        if value_type == "float":
+            return(float(value))
+        if value_type == "bool":
+            return(boolean(value))
+        if value_type == "path":
+            return(os.path.expanduser(os.path.expandvars(value)))
+        return(value)
+
+    def fail_json(self, msg, **kwargs):
+        info = kwargs.get("fetch_url_info")
+        if info:
+            msg = "%s %s" % (msg, info.get("msg", ""))
+        raise AnsibleError(msg)
+
+    def from_json(self, data):
+        return(json.loads(data))
+
+    def jsonify(self, data):
+        return(json.dumps(data))
+
+    def debug(self, msg):
+        pass
+
+    def warn(self, msg):
+        pass
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.confluent.cloud.plugins.callback.api_cost import CallbackModule
+
+
+class Task:
+    def __init__(self, name, action, args):
+        self.name = name
+        self.action = action
+        self.resolved_action = action
+        self.args = args
+        self._uuid = "uuid-%s" % name
+
+    def get_name(self):
+        return(self.name)
+
+
+class Host:
+    def __init__(self, name):
+        self.name = name
+
+    def get_name(self):
+        return(self.name)
+
+
+class Result:
+    def __init__(self, task, host, result):
+        self._task = task
+        self._host = host
+        self._result = result
+
+
+class Play:
+    def __init__(self, name):
+        self.name = name
+
+    def get_name(self):
+        return(self.name)
+
+
+def module_result(args, changed=False, **api_stats):
+    result = dict(changed=changed, invocation=dict(module_args=args))
+    if api_stats:
+        result["api_stats"] = api_stats
+    return(result)
+
+
+@pytest.fixture
+def callback(tmp_path):
+    # Options as set_options() would load them, without the plugin loader
+    callback = CallbackModule()
+    callback._plugin_options = dict(top=10, report_path=str(tmp_path / "cost.json"))
+    callback.v2_playbook_on_play_start(Play("configure"))
+    return(callback)
+
+
+def run(callback, task, hosts, status="ok", results=None):
+    callback.v2_playbook_on_task_start(task, False)
+    for host in hosts:
+        callback.v2_runner_on_start(host, task)
+    for host in hosts:
+        result = Result(task, host, results[host.get_name()] if results else module_result(task.args))
+        if status == "skipped":
+            callback.v2_runner_on_skipped(result)
+        elif status == "failed":
+            callback.v2_runner_on_failed(result)
+        else:
+            callback.v2_runner_on_ok(result)
+
+
+def test_aggregation(callback):
+    hosts = [Host("a"), Host("b")]
+    environment = Task("environment", "confluent.cloud.environment_info", dict(ids=["env-1", "env-2"]))
+    run(callback, environment, hosts, results=dict(
+        a=module_result(environment.args, requests=2, retries=1, latency=0.5),
+        b=module_result(environment.args, requests=3, latency=0.25),
+    ))
+    cluster = Task("cluster", "confluent.cloud.cluster", dict(name="orders", environment="env-1"))
+    run(callback, cluster, hosts[:1], results=dict(a=module_result(cluster.args, changed=True, requests=4)))
+    run(callback, Task("debug", "ansible.builtin.debug", dict(msg="x")), hosts)
+    run(callback, Task("skipped", "confluent.cloud.cluster", dict(name="x")), hosts, status="skipped")
+
+    report = callback.report(callback.play)
+    assert report["tasks"] == 3
+    assert report["by_module"]["environment_info"]["tasks"] == 2
+    assert report["by_module"]["environment_info"]["requests"] == 5
+    assert report["by_module"]["environment_info"]["retries"] == 1
+    assert report["by_module"]["environment_info"]["latency"] == 0.75
+    assert report["by_module"]["cluster"]["requests"] == 4
+    assert sorted(report["by_resource"]) == ["cluster name=orders", "environment_info ids=env-1,env-2"]
+    assert report["by_resource"]["environment_info ids=env-1,env-2"]["tasks"] == 2
+    assert len(report["slowest"]) == 3
+
+    # Every start time is dropped once the task is done
+    assert callback.started == dict()
+
+
+def test_loop_results(callback):
+    task = Task("environments", "confluent.cloud.environment", dict(name="{{ item }}"))
+    run(callback, task, [Host("a")], results=dict(a=dict(changed=True, results=[
+        module_result(dict(name="dev"), changed=True, requests=2),
+        module_result(dict(name="prod"), requests=1),
+    ])))
+
+    entry = callback.play["entries"][0]
+    assert entry["resource"] == "name=dev;name=prod"
+    assert entry["requests"] == 3
+    assert entry["lookups"] == ['environment {"name": "prod"}']
+
+
+def test_repeated_lookups(callback):
+    hosts = [Host("a"), Host("b")]
+    args = dict(names=["dev"], api_key="key", validate_certs=False)
+    run(callback, Task("first", "confluent.cloud.environment_info", args), hosts)
+    run(callback, Task("second", "confluent.cloud.environment_info", dict(args, api_key="other")), hosts[:1])
+
+    # Changes and failures are not lookups
+    run(callback, Task("create", "confluent.cloud.environment", dict(name="dev")), hosts, results=dict(
+        a=module_result(dict(name="dev"), changed=True),
+        b=module_result(dict(name="dev"), changed=True),
+    ))
+    run(callback, Task("missing", "confluent.cloud.environment_info", dict(names=["qa"])), hosts, status="failed")
+    run(callback, Task("other", "confluent.cloud.environment_info", dict(names=["prod"])), hosts[:1])
+
+    repeated = callback.report(callback.play)["repeated"]
+    assert len(repeated) == 1
+    assert repeated[0]["lookup"] == 'environment_info {"names": ["dev"]}'
+    assert repeated[0]["count"] == 3
+    assert repeated[0]["tasks"] == ["first", "second"]
+    assert repeated[0]["hosts"] == ["a", "b"]
+
+
+def test_task_start_fallback(callback):
+    # Without v2_runner_on_start the task start is used, until the play ends
+    task = Task("environment", "confluent.cloud.environment_info", dict(ids=["env-1"]))
+    callback.v2_playbook_on_task_start(task, False)
+    for host in (Host("a"), Host("b")):
+        callback.v2_runner_on_ok(Result(task, host, module_result(task.args)))
+    assert len(callback.play["entries"]) == 2
+    assert list(callback.started) == [task._uuid]
+
+    callback.v2_playbook_on_play_start(Play("next"))
+    assert callback.started == dict()
+
+
+def test_json_report(callback, tmp_path, capsys):
+    task = Task("environment", "confluent.cloud.environment_info", dict(ids=["env-1"]))
+    run(callback, task, [Host("a")], results=dict(a=module_result(task.args, requests=1)))
+    callback.v2_playbook_on_play_start(Play("empty"))
+    callback.v2_playbook_on_stats(None)
+
+    with open(str(tmp_path / "cost.json")) as f:
+        report = json.load(f)
+    assert [play["name"] for play in report["plays"]] == ["configure", "empty"]
+    assert report["plays"][0]["by_module"]["environment_info"]["requests"] == 1
+    assert report["plays"][1]["tasks"] == 0
+    assert report["total"]["tasks"] == 1
+    assert report["total"]["time"] == report["plays"][0]["time"]
+
+    # Only plays with Confluent tasks are printed
+    out = capsys.readouterr().out
+    assert "CONFLUENT API COST [configure]" in out
+    assert "CONFLUENT API COST [empty]" not in out
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.confluent.cloud.plugins.httpapi.confluent import HttpApi
+from ansible_collections.confluent.cloud.tests.unit.utils.mock_confluent import MockConfluentServer
+
+
+class Connection:
+    # Stand-in for the ansible.netcommon.httpapi connection: like the real
+    # one it only sets _url and calls login() from _connect()
+
+    def __init__(self, url, user=None, password=None):
+        host, port = url.split("//")[1].split(":")
+        self.options = dict(
+            host=host,
+            port=int(port),
+            use_ssl=False,
+            remote_user=user,
+            password=password,
+            validate_certs=True,
+            persistent_command_timeout=30,
+        )
+        self._connected = False
+        self.logins = 0
+        self.httpapi = HttpApi(self)
+
+    def get_option(self, option):
+        return(self.options[option])
+
+    def _connect(self):
+        if not self._connected:
+            protocol = "https" if self.get_option("use_ssl") else "http"
+            self._url = "%s://%s:%s" % (protocol, self.get_option("host"), self.get_option("port"))
+            self._connected = True
+            self.logins += 1
+            self.httpapi.login(self.get_option("remote_user"), self.get_option("password"))
+
+
+@pytest.fixture(scope="module")
+def server():
+    with MockConfluentServer(org_size=3) as server:
+        yield server
+
+
+def test_send_request(server):
+    connection = Connection(server.url, server.config["api_key"], server.config["api_secret"])
+    httpapi = connection.httpapi
+
+    resp = httpapi.send_request(None, "/org/v2/environments?page_size=1")
+    assert resp["info"]["status"] == 200
+    assert json.loads(resp["body"])["data"][0]["id"] == "env-000000"
+    assert resp["reused"] is False
+
+    # One login, then the warm connection is reused
+    resp = httpapi.send_request(None, "/org/v2/environments/env-000001")
+    assert resp["info"]["status"] == 200
+    assert resp["reused"] is True
+    assert connection.logins == 1
+
+    httpapi.logout()
+
+
+def test_send_request_without_credentials(server):
+    resp = Connection(server.url).httpapi.send_request(None, "/org/v2/environments")
+    assert resp["info"]["status"] == 401
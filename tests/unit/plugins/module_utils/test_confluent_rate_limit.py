@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import (
+    ConfluentRateLimiter,
+    rate_limit_exhausted,
+    retry_after,
+)
+
+
+def test_pacing(tmp_path):
+    # The burst goes out at once, every further request waits its slot.
+    # Only the lower bound is exact, sleeps never end early, the upper one
+    # leaves room for loaded test runners.
+    limiter = ConfluentRateLimiter(str(tmp_path / "state.json"), 50)
+    start = time.time()
+    for i in range(100):
+        limiter.acquire()
+    elapsed = time.time() - start
+    assert 50 / 50.0 <= elapsed < 50 / 50.0 * 3 + 1
+
+
+def test_pacing_shared_between_workers(tmp_path):
+    # Limiters on the same state file, like forks, share one bucket
+    path = str(tmp_path / "state.json")
+    limiters = [ConfluentRateLimiter(path, 20) for i in range(4)]
+
+    def run(limiter):
+        for i in range(10):
+            limiter.acquire()
+
+    start = time.time()
+    threads = [threading.Thread(target=run, args=(limiter,)) for limiter in limiters]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - start
+    assert (40 - 20) / 20.0 <= elapsed < (40 - 20) / 20.0 * 3 + 1
+
+
+def test_block_pauses_every_worker(tmp_path):
+    path = str(tmp_path / "state.json")
+    ConfluentRateLimiter(path, 100).block(0.5)
+
+    # Every worker on the state file waits for the block to pass
+    waits = []
+
+    def run():
+        start = time.time()
+        ConfluentRateLimiter(path, 100).acquire()
+        waits.append(time.time() - start)
+
+    threads = [threading.Thread(target=run) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(waits) == 3 and min(waits) >= 0.45
+
+    # Only requests reserved before the block ended wait
+    start = time.time()
+    ConfluentRateLimiter(path, 100).acquire()
+    assert time.time() - start < 0.5
+
+
+@pytest.mark.parametrize("info, expected", [
+    ({"retry-after": "5"}, 5),
+    ({"retry-after": "0.5"}, 0.5),
+    ({"retry-after": "-3"}, 0),
+    ({"ratelimit-reset": "7"}, 7),
+    ({"x-ratelimit-reset": "12"}, 12),
+    ({"retry-after": "soon", "ratelimit-reset": "4"}, 4),
+    ({"ratelimit-reset": "soon"}, None),
+    ({}, None),
+])
+def test_retry_after_delta(info, expected):
+    assert retry_after(info) == expected
+
+
+def test_retry_after_http_date():
+    assert 28 <= retry_after({"retry-after": formatdate(time.time() + 30, usegmt=True)}) <= 30
+    assert retry_after({"retry-after": formatdate(time.time() - 30, usegmt=True)}) == 0
+
+
+def test_retry_after_epoch_reset():
+    assert 18 <= retry_after({"x-ratelimit-reset": str(int(time.time()) + 20)}) <= 20
+    assert retry_after({"ratelimit-reset": str(int(time.time()) - 20)}) == 0
+
+
+@pytest.mark.parametrize("info, expected", [
+    ({"ratelimit-remaining": "0"}, True),
+    ({"x-ratelimit-remaining": "3"}, False),
+    ({"ratelimit-remaining": "n/a"}, False),
+    ({}, False),
+])
+def test_rate_limit_exhausted(info, expected):
+    assert rate_limit_exhausted(info) is expected
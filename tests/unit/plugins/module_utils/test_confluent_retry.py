@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import time
+
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import ConfluentRetryPolicy, confluent_retry_policy
+from ansible_collections.confluent.cloud.plugins.plugin_utils.confluent import ConfluentPluginModule
+
+
+def test_retry_policy_per_module():
+    # Controller plugins create a module per run in one long-lived process,
+    # each run gets a budget and a circuit breaker of its own
+    first = ConfluentPluginModule(dict(api_key="key", api_secret="secret", api_retry_budget=0))
+    policy = confluent_retry_policy(first)
+    assert confluent_retry_policy(first) is policy
+    assert policy.remaining() == 0
+    for i in range(10):
+        policy.record(503)
+    assert policy.circuit_open()
+
+    second = confluent_retry_policy(ConfluentPluginModule(dict(api_key="key", api_secret="secret")))
+    assert second is not policy
+    assert second.remaining() > 100
+    assert not second.circuit_open()
+
+
+def test_circuit_breaker_half_open():
+    policy = ConfluentRetryPolicy(budget=60, threshold=2, cooldown=0.2)
+    policy.record(503)
+    assert policy.allow()
+    policy.record(-1)
+    assert policy.circuit_open() and not policy.allow()
+
+    # One probe once the cooldown is over, the others keep waiting
+    time.sleep(0.25)
+    assert policy.allow()
+    assert not policy.allow()
+
+    # A failed probe keeps the circuit open for another cooldown
+    policy.record(502)
+    assert not policy.allow()
+    time.sleep(0.25)
+    assert policy.allow()
+
+    # A successful one closes it
+    policy.record(200)
+    assert not policy.circuit_open()
+    assert policy.allow() and policy.allow()
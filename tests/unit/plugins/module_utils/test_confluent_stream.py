@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.confluent.cloud.plugins.module_utils.confluent_api import ConfluentJSONStream
+
+
+class Chunks:
+    # Serves a body in fixed size chunks, like a response arriving slowly
+    def __init__(self, body, size):
+        self.data = body.encode("utf-8")
+        self.size = size
+
+    def read(self):
+        chunk, self.data = self.data[:self.size], self.data[self.size:]
+        return(chunk)
+
+
+PAGE = {
+    "api_version": "org/v2",
+    "kind": "EnvironmentList",
+    "data": [
+        {"id": "env-1", "display_name": u"dév ☃", "count": 12345},
+        {"id": "env-2", "display_name": "prod", "tags": [], "nested": {"a": [1, 2.5, None, True]}},
+    ],
+    "metadata": {"next": "https://api.confluent.cloud/org/v2/environments?page_token=2"},
+}
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 4096])
+def test_items_and_document(size):
+    page = ConfluentJSONStream(Chunks(json.dumps(PAGE, indent=1), size))
+    assert list(page.items()) == PAGE["data"]
+    assert page.document == dict((k, v) for k, v in PAGE.items() if k != "data")
+
+
+def test_number_split_across_chunks():
+    page = ConfluentJSONStream(Chunks('{"data": [123456789], "total": 42}', 3))
+    assert list(page.items()) == [123456789]
+    assert page.document == {"total": 42}
+
+
+class Pieces:
+    # Serves a body in the given pieces
+    def __init__(self, *pieces):
+        self.pieces = [p.encode("utf-8") for p in pieces]
+
+    def read(self):
+        return(self.pieces.pop(0) if self.pieces else b"")
+
+
+@pytest.mark.parametrize("pieces", [
+    ('{"data": [1.', '5, 2], "x": 1}'),
+    ('{"data": [1', '.5, 2], "x": 1}'),
+    ('{"data": [1.5e', '0, 2], "x": 1}'),
+    ('{"data": [1.5E+', '0, 2], "x": 1}'),
+    ('{"data": [-', '1.5, 2], "x": 1}'),
+])
+def test_number_split_after_any_character(pieces):
+    page = ConfluentJSONStream(Pieces(*pieces))
+    assert [abs(v) for v in page.items()] == [1.5, 2]
+    assert page.document == {"x": 1}
+
+
+def test_empty_page():
+    page = ConfluentJSONStream(Chunks('{"data": [], "metadata": {}}', 1))
+    assert list(page.items()) == []
+    assert page.document == {"metadata": {}}
+
+
+def test_truncated_page():
+    page = ConfluentJSONStream(Chunks('{"data": [{"id": "env-1"}, {"id": "en', 5))
+    with pytest.raises(ValueError):
+        list(page.items())
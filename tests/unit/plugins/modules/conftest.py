@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import time
+import tracemalloc
+
+import pytest
+
+from ansible.module_utils import basic
+from ansible.module_utils._text import to_bytes
+
+from ansible_collections.confluent.cloud.plugins.module_utils import confluent_api, confluent_cache
+from ansible_collections.confluent.cloud.tests.unit.utils.mock_confluent import MockConfluentServer
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+try:
+    from ansible.module_utils.testing import patch_module_args
+except ImportError:
+    patch_module_args = None
+
+
+# Org sizes the benchmarks run against, e.g. CONFLUENT_BENCH_ORG_SIZES=10,1000,100000
+ORG_SIZES = [int(s) for s in os.environ.get("CONFLUENT_BENCH_ORG_SIZES", "10,1000").split(",")]
+
+
+# SystemExit like the real exit_json/fail_json, so the modules' own
+# "except Exception" handlers do not swallow them
+class AnsibleExitJson(SystemExit):
+    pass
+
+
+class AnsibleFailJson(SystemExit):
+    pass
+
+
+def exit_json(self, **kwargs):
+    kwargs.setdefault("changed", False)
+    raise AnsibleExitJson(kwargs)
+
+
+def fail_json(self, msg, **kwargs):
+    kwargs.update(msg=msg, failed=True)
+    raise AnsibleFailJson(kwargs)
+
+
+def module_args(args):
+    if patch_module_args:
+        return(patch_module_args(args))
+    return(mock.patch.object(basic, "_ANSIBLE_ARGS", to_bytes(json.dumps({"ANSIBLE_MODULE_ARGS": args}))))
+
+
+def reset_run_state():
+    # Each module run starts in a fresh AnsiballZ process, forget the
+    # connection pool and friends from the previous run
+    for session in confluent_api._SESSIONS.values():
+        session.close()
+    confluent_api._SESSIONS.clear()
+    confluent_cache._CACHES.clear()
+    confluent_api._LIMITERS.clear()
+    confluent_api._STATS = None
+
+
+def run_module(module, args):
+    # Run module.main() in-process and return its result dict
+    reset_run_state()
+    with module_args(args):
+        with mock.patch.object(basic.AnsibleModule, "exit_json", exit_json):
+            with mock.patch.object(basic.AnsibleModule, "fail_json", fail_json):
+                try:
+                    module.main()
+                except (AnsibleExitJson, AnsibleFailJson) as e:
+                    return(e.args[0])
+    raise AssertionError("module did not call exit_json or fail_json")
+
+
+def measure(server, module, args):
+    # Run a module against the mock server and return (result, measurements)
+    server.reset()
+    tracemalloc.start()
+    start = time.time()
+    try:
+        result = run_module(module, server.module_args(**args))
+        wall_time = time.time() - start
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    stats = server.stats()
+    measurements = dict(
+        requests=stats["requests"],
+        connections=stats["connections"],
+        bytes_received=stats["bytes_sent"],
+        statuses=stats["statuses"],
+        wall_time=wall_time,
+        peak_memory=peak_memory,
+    )
+    print("\n%s %s %s" % (module.__name__.split(".")[-1], json.dumps(args, sort_keys=True), json.dumps(measurements, sort_keys=True)))
+    return(result, measurements)
+
+
+_SERVERS = dict()
+
+
+@pytest.fixture(scope="session")
+def mock_servers():
+    yield _SERVERS
+    for server in _SERVERS.values():
+        server.stop()
+
+
+@pytest.fixture(params=ORG_SIZES, ids=lambda size: "org%d" % size)
+def org(request, mock_servers):
+    # A shared read-mostly server per org size
+    if request.param not in mock_servers:
+        mock_servers[request.param] = MockConfluentServer(org_size=request.param).start()
+    return(mock_servers[request.param])
+
+
+@pytest.fixture
+def server():
+    # A private server, for tests that write or inject faults
+    with MockConfluentServer(org_size=25) as server:
+        yield server
+
+
+@pytest.fixture
+def tenant():
+    # A private server whose environments hold clusters with API keys
+    with MockConfluentServer(org_size=5, clusters_per_environment=3, api_keys_per_cluster=2, service_accounts=2) as server:
+        yield server
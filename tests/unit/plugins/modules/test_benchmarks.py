@@ -0,0 +1,479 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Request count, wall time and peak memory of the modules against the mock
+# Confluent Cloud API.  Request counts are asserted exactly so pagination,
+# retry and concurrency regressions show up offline, run with -s to see the
+# measurements.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import tempfile
+import time
+
+from ansible_collections.confluent.cloud.plugins.module_utils import confluent_api
+from ansible_collections.confluent.cloud.plugins.modules import (
+    cluster_info,
+    environment,
+    environment_info,
+    export,
+    ping,
+    reconcile,
+    service_account_info,
+)
+from ansible_collections.confluent.cloud.tests.unit.plugins.modules.conftest import measure
+from ansible_collections.confluent.cloud.tests.unit.utils.mock_confluent import MockConfluentServer
+
+
+def pages(org_size, page_size=100):
+    return(max(1, -(-org_size // page_size)))
+
+
+def test_ping_single_request(org):
+    result, bench = measure(org, ping, dict())
+    assert result["ping"] == "pong"
+    assert bench["requests"] == 1
+
+
+def test_environment_info_full_listing(org):
+    size = org.config["org_size"]
+    result, bench = measure(org, environment_info, dict())
+    assert len([k for k in result if k.startswith("env-")]) == size
+    assert bench["requests"] == pages(size)
+    assert bench["connections"] == 1
+
+
+def test_environment_info_page_size(org):
+    size = org.config["org_size"]
+    result, bench = measure(org, environment_info, dict(api_page_size=10))
+    assert bench["requests"] == pages(size, 10)
+
+
+def test_environment_info_ids_stop_early(org):
+    size = org.config["org_size"]
+    result, bench = measure(org, environment_info, dict(ids=["env-000000"]))
+    assert "env-000000" in result
+    assert bench["requests"] == 1
+
+    full_result, full_bench = measure(org, environment_info, dict())
+    if size >= 1000:
+        assert bench["peak_memory"] * 2 < full_bench["peak_memory"]
+
+
+def test_environment_lookup_by_id(org):
+    result, bench = measure(org, environment, dict(id="env-000001", name="environment-1"))
+    assert result["changed"] is False
+    assert bench["requests"] == 1
+    assert bench["statuses"] == {"200": 1}
+
+
+def test_environment_lookup_by_name(org):
+    size = org.config["org_size"]
+    result, bench = measure(org, environment, dict(name="environment-%d" % (size - 1)))
+    assert result["changed"] is False
+    assert bench["requests"] == pages(size)
+
+
+def test_environment_create_and_remove(server):
+    result, bench = measure(server, environment, dict(name="bench-env"))
+    assert result["changed"] is True
+    assert bench["requests"] == 2
+
+    result, bench = measure(server, environment, dict(name="bench-env", state="absent"))
+    assert result["changed"] is True
+    assert bench["requests"] == 2
+    assert bench["statuses"] == {"200": 1, "204": 1}
+
+
+def test_environment_bulk_concurrency(server):
+    items = [dict(name="bulk-%d" % i) for i in range(12)]
+    result, bench = measure(server, environment, dict(environments=items, api_concurrency=4))
+    assert result["changed"] is True
+    assert [r["display_name"] for r in result["environments"]] == [i["name"] for i in items]
+    assert bench["requests"] == 1 + len(items)
+    assert bench["connections"] <= 4
+
+
+def test_environment_bulk_duplicates(server):
+    # Listed twice by name, or by id and by name, nothing is written
+    for items in ([dict(name="dev"), dict(name="dev")],
+                  [dict(id="env-000001", state="absent"), dict(id="env-000001", state="absent")],
+                  [dict(id="env-000001", name="renamed"), dict(name="environment-1")]):
+        result, bench = measure(server, environment, dict(environments=items))
+        assert result["failed"] is True
+        assert "more than once" in result["msg"]
+        assert bench["requests"] == 1
+
+
+def test_environment_bulk_unexpected_error(server, monkeypatch):
+    # An error other than an API failure fails its own item only, the
+    # worker goes on with the rest of the queue
+    api_response = confluent_api.AnsibleConfluent.api_response
+    failures = []
+
+    def broken_response(self, path, method, resp_body, info):
+        if method == "PATCH" and not failures:
+            failures.append(path)
+            raise ValueError("not JSON")
+        return(api_response(self, path, method, resp_body, info))
+
+    monkeypatch.setattr(confluent_api.AnsibleConfluent, "api_response", broken_response)
+    items = [dict(id="env-000001", name="renamed-1"), dict(id="env-000002", name="renamed-2")]
+    result, bench = measure(server, environment, dict(environments=items, api_concurrency=1))
+    assert result["failed"] is True
+    assert bench["requests"] == 1 + 2
+    first, second = result["environments"]
+    assert first["failed"] is True and first["fetch_url_info"] == dict(status=-1, msg="not JSON")
+    assert second["changed"] is True and not second.get("failed")
+
+
+def test_retry_on_429(server):
+    server.inject(429, count=2, retry_after=0)
+    result, bench = measure(server, ping, dict())
+    assert result["ping"] == "pong"
+    assert bench["requests"] == 3
+    assert bench["statuses"] == {"429": 2, "200": 1}
+
+
+def test_retry_on_server_error(server):
+    server.inject(503, retry_after=0)
+    server.inject(502)
+    result, bench = measure(server, ping, dict(api_retry_max_delay=1))
+    assert result["ping"] == "pong"
+    assert bench["requests"] == 3
+
+
+def test_no_retry_on_post_server_error(server):
+    server.inject(503, method="POST")
+    result, bench = measure(server, environment, dict(id="env-missing", name="new-env"))
+    assert result["failed"] is True
+    assert bench["statuses"] == {"404": 1, "200": 1, "503": 1}
+
+
+def test_retry_budget(server):
+    server.inject(503, count=20)
+    result, bench = measure(server, ping, dict(api_retries=20, api_retry_budget=2, api_circuit_breaker_threshold=0))
+    assert result["failed"] is True
+    assert bench["wall_time"] < 4
+
+
+def test_circuit_breaker(server):
+    server.inject(503, count=50, retry_after=0, method="PATCH")
+    items = [dict(id="env-%06d" % i, name="renamed-%d" % i) for i in range(10)]
+    result, bench = measure(server, environment, dict(environments=items, api_retries=2, api_circuit_breaker_threshold=4))
+    assert result["failed"] is True
+    assert bench["requests"] <= 1 + 4 + 3
+    assert "circuit breaker" in result["environments"][-1]["fetch_url_info"]["msg"]
+
+
+def test_unauthorized(server):
+    result, bench = measure(server, ping, dict(api_secret="wrong"))
+    assert result["failed"] is True
+    assert result["fetch_url_info"]["status"] == 401
+
+
+def test_api_stats_and_trace(server, tmp_path, monkeypatch):
+    trace = tmp_path / "trace.jsonl"
+    monkeypatch.setenv("CONFLUENT_API_TRACE", str(trace))
+    server.inject(429, retry_after=0)
+    result, bench = measure(server, environment_info, dict(api_stats=True, api_page_size=10))
+
+    stats = result["api_stats"]
+    assert stats["requests"] == bench["requests"] == 4
+    assert stats["calls"] == 3
+    assert stats["retries"] == 1
+    assert stats["statuses"] == {"200": 3}
+    assert stats["connections"] == 1
+    assert stats["handshakes_avoided"] == 3
+    assert stats["bytes_received"] == bench["bytes_received"]
+    assert len(trace.read_text().splitlines()) == 3
+
+
+def test_profile(server, tmp_path, monkeypatch):
+    monkeypatch.setenv("CONFLUENT_API_PROFILE", str(tmp_path / "profile"))
+    result, bench = measure(server, environment_info, dict(api_profile_memory=True))
+    profile = result["profile"]
+    assert len(profile["functions"]) == 10
+    assert profile["functions"][0]["tottime"] >= profile["functions"][-1]["tottime"]
+    assert profile["memory_peak"] > 0
+    assert os.path.getsize(profile["pstats"]) > 0
+    assert os.path.getsize(profile["memory"]) > 0
+
+    # Failed tasks are profiled as well
+    result, bench = measure(server, ping, dict(api_secret="wrong"))
+    assert result["failed"] is True
+    assert os.path.exists(result["profile"]["pstats"])
+
+
+def test_environment_update_sends_minimal_patch(server):
+    result, bench = measure(server, environment, dict(id="env-000002"))
+    assert result["changed"] is False
+    assert bench["requests"] == 1
+
+    result, bench = measure(server, environment, dict(id="env-000002", name="renamed", _ansible_diff=True))
+    assert result["changed"] is True
+    assert result["display_name"] == "renamed"
+    assert result["diff"] == {"before": {"display_name": "environment-2"}, "after": {"display_name": "renamed"}}
+    assert bench["requests"] == 2
+
+
+def test_environment_info_compact_output(org):
+    size = org.config["org_size"]
+    full_result, full_bench = measure(org, environment_info, dict())
+
+    result, bench = measure(org, environment_info, dict(fields=["id", "metadata.created_at"], output="list"))
+    assert len(result["environments"]) == size
+    assert result["environments"][0] == {"id": "env-000000", "metadata": {"created_at": "2022-01-01T00:00:00Z"}}
+    assert bench["requests"] == full_bench["requests"]
+    if size >= 1000:
+        assert bench["peak_memory"] < full_bench["peak_memory"]
+
+    result, bench = measure(org, environment_info, dict(count_only=True))
+    assert result["count"] == size
+
+
+def test_environment_cascade_check_mode(tenant):
+    result, bench = measure(tenant, environment, dict(id="env-000001", state="absent", cascade=True, _ansible_check_mode=True))
+    assert result["changed"] is True
+    assert result["cascade"]["clusters"] == ["lkc-000003", "lkc-000004", "lkc-000005"]
+    assert len(result["cascade"]["api_keys"]) == 6
+    # Lookup, one cluster listing and one key listing per cluster
+    assert bench["requests"] == 1 + 1 + 3
+    assert list(tenant.stats()["methods"]) == ["GET"]
+
+
+def test_environment_cascade(tenant):
+    result, bench = measure(tenant, environment, dict(id="env-000001", state="absent", cascade=True, wait=True))
+    assert result["changed"] is True
+    assert len(result["cascade"]["api_keys"]) == 6
+    # Discovery as above, 6 key and 3 cluster deletes, one listing to see the
+    # clusters gone, the environment delete and one poll for it
+    assert bench["requests"] == 5 + 6 + 3 + 1 + 1 + 1
+    assert bench["statuses"] == {"200": 6, "204": 10, "404": 1}
+
+    result, bench = measure(tenant, environment, dict(
+        environments=[dict(id="env-000002", state="absent"), dict(id="env-000003", state="absent")],
+        cascade=True,
+    ))
+    assert [len(r["cascade"]["clusters"]) for r in result["environments"]] == [3, 3]
+    assert bench["statuses"]["204"] == 12 + 6 + 2
+
+    # Clusters and keys of the other environments are untouched
+    result, bench = measure(tenant, environment, dict(id="env-000000", state="absent", cascade=True, _ansible_check_mode=True))
+    assert len(result["cascade"]["api_keys"]) == 6
+
+
+def reconcile_document():
+    return(dict(
+        environments=[
+            dict(name="environment-0", clusters=[
+                dict(name="cluster-0", cloud="AWS", region="us-west-2"),
+                dict(name="cluster-1", cloud="AWS", region="us-west-2", type="Standard"),
+                dict(name="cluster-new", cloud="GCP", region="us-central1"),
+            ]),
+            dict(name="environment-1"),
+            dict(name="environment-new", clusters=[dict(name="cluster-0", cloud="AWS", region="us-east-1")]),
+        ],
+        service_accounts=[dict(name="service-account-0", description="orders"), dict(name="service-account-new")],
+    ))
+
+
+def test_reconcile_plan_and_apply(tenant):
+    doc = reconcile_document()
+    result, bench = measure(tenant, reconcile, dict(doc, _ansible_check_mode=True))
+    assert result["summary"] == {"create": 4, "update": 2, "delete": 0}
+    assert [(s["level"], s["action"], s["type"], s["name"]) for s in result["plan"]] == [
+        (0, "create", "environment", "environment-new"),
+        (0, "update", "service_account", "service-account-0"),
+        (0, "create", "service_account", "service-account-new"),
+        (1, "update", "cluster", "cluster-1"),
+        (1, "create", "cluster", "cluster-new"),
+        (1, "create", "cluster", "cluster-0"),
+    ]
+    assert result["plan"][3]["data"] == {"spec": {"config": {"kind": "Standard"}}}
+    # One listing per resource type, clusters only for environment-0
+    assert bench["requests"] == 3
+
+    result, bench = measure(tenant, reconcile, doc)
+    assert result["changed"] is True
+    assert all(s.get("id") for s in result["plan"])
+    assert bench["requests"] == 3 + 6
+
+    result, bench = measure(tenant, reconcile, doc)
+    assert result["changed"] is False
+    assert bench["requests"] == 4
+
+
+def test_reconcile_prune(tenant):
+    doc = dict(environments=[dict(name="environment-0", clusters=[dict(name="cluster-0", cloud="AWS", region="us-west-2")])], prune=True)
+    result, bench = measure(tenant, reconcile, dict(doc, _ansible_check_mode=True))
+    assert result["summary"] == {"create": 0, "update": 0, "delete": 2 + 4 * 3 + 4}
+    # Environment listing, then the clusters of every environment
+    assert bench["requests"] == 1 + 5
+
+    result, bench = measure(tenant, reconcile, doc)
+    assert result["changed"] is True
+    assert bench["statuses"]["204"] == 18
+
+    result, bench = measure(tenant, reconcile, doc)
+    assert result["changed"] is False
+
+
+def test_reconcile_duplicate_environment_names(tenant):
+    # The first environment of a name is the one matched, clusters go there
+    measure(tenant, environment, dict(id="env-000002", name="environment-1"))
+    doc = dict(environments=[dict(name="environment-1", clusters=[
+        dict(name="cluster-%d" % i, cloud="AWS", region="us-west-2") for i in range(3)] + [
+        dict(name="cluster-new", cloud="AWS", region="us-west-2")])])
+    result, bench = measure(tenant, reconcile, doc)
+    assert [(s["action"], s["environment_id"]) for s in result["plan"]] == [("create", "env-000001")]
+
+    result, bench = measure(tenant, cluster_info, dict(names=["cluster-new"], fields=["spec.environment.id"], output="list"))
+    assert result["clusters"] == [{"spec": {"environment": {"id": "env-000001"}}}]
+
+
+def test_environment_info_compressed(org):
+    size = org.config["org_size"]
+    result, bench = measure(org, environment_info, dict(output="list"))
+    with MockConfluentServer(org_size=size, compression=False) as plain:
+        plain_result, plain_bench = measure(plain, environment_info, dict(output="list"))
+    assert result == plain_result
+    assert bench["requests"] == plain_bench["requests"]
+    if size >= 1000:
+        assert bench["bytes_received"] * 5 < plain_bench["bytes_received"]
+
+
+def test_environment_info_streaming_memory(org, tmp_path):
+    # Whole pages are only decoded at once when they go through the cache
+    size = org.config["org_size"]
+    result, bench = measure(org, environment_info, dict(count_only=True))
+    cached_result, cached_bench = measure(org, environment_info, dict(count_only=True, api_cache=True, api_cache_dir=str(tmp_path)))
+    assert result["count"] == cached_result["count"] == size
+    if size >= 1000:
+        assert bench["peak_memory"] * 2 < cached_bench["peak_memory"]
+
+
+def test_export_delta_sync(tenant, tmp_path):
+    path = str(tmp_path / "org.jsonl")
+    args = dict(path=path, resources=["environments", "clusters", "service_accounts"])
+    result, bench = measure(tenant, export, args)
+    assert result["full"] is True
+    assert result["total"] == {"environments": 5, "clusters": 15, "service_accounts": 2}
+    assert len(result["delta"]["clusters"]["created"]) == 15
+    # Environments, clusters per environment, service accounts
+    assert bench["requests"] == 1 + 5 + 1
+    size = len(open(path).read())
+
+    result, bench = measure(tenant, export, args)
+    assert result["changed"] is False
+    assert len(open(path).read()) == size
+
+    measure(tenant, environment, dict(id="env-000001", name="renamed"))
+    measure(tenant, environment, dict(id="env-000004", state="absent", cascade=True))
+    measure(tenant, environment, dict(name="added"))
+    result, bench = measure(tenant, export, args)
+    assert result["full"] is False
+    assert result["delta"]["environments"] == {"created": ["env-n00005"], "changed": ["env-000001"], "deleted": ["env-000004"]}
+    assert len(result["delta"]["clusters"]["deleted"]) == 3
+    # Only the delta and its commit line were appended
+    assert len(open(path).read().splitlines()) == 1 + 5 + 15 + 2 + 1 + 1 + 1 + 3 + 1
+
+    # An interrupted append is dropped on the next run
+    with open(path, "a") as f:
+        f.write('{"op":"delete","kind":"environment","id":"env-000000"}\n{"op":"pu')
+    result, bench = measure(tenant, export, args)
+    assert result["changed"] is False
+
+    result, bench = measure(tenant, export, dict(args, compact=True))
+    assert result["full"] is True
+    assert len(open(path).read().splitlines()) == 5 + 12 + 2 + 1
+
+
+def test_cluster_info_fan_out():
+    with MockConfluentServer(org_size=20, clusters_per_environment=2, latency=0.02) as server:
+        result, bench = measure(server, cluster_info, dict(api_concurrency=4))
+        assert len([k for k in result if k.startswith("lkc-")]) == 40
+        assert result["lkc-000003"]["spec"]["environment"]["id"] == "env-000001"
+        # One environment listing, then one cluster listing per environment
+        assert bench["requests"] == 1 + 20
+        assert bench["connections"] <= 4
+
+        result, bench = measure(server, cluster_info, dict(environments=["env-000002"], names=["cluster-1"], fields=["id"], output="list"))
+        assert result["clusters"] == [{"id": "lkc-000005"}]
+        assert bench["requests"] == 1
+
+
+def test_service_account_info(tenant):
+    result, bench = measure(tenant, service_account_info, dict())
+    assert sorted(k for k in result if k.startswith("sa-")) == ["sa-000000", "sa-000001"]
+    assert bench["requests"] == 1
+
+    result, bench = measure(tenant, service_account_info, dict(names=["service-account-1"], fields=["id"], output="list"))
+    assert result["service_accounts"] == [{"id": "sa-000001"}]
+
+
+def test_single_flight_across_forks(tmp_path, monkeypatch):
+    # Identical lookups from concurrent forks cost one request with api_coalesce
+    import multiprocessing
+    from ansible_collections.confluent.cloud.tests.unit.plugins.modules.conftest import run_module
+
+    # gettempdir() caches its answer, TMPDIR would come too late
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    flight = tmp_path / ("ansible-confluent-flight-%d" % os.getuid())
+    context = multiprocessing.get_context("fork")
+
+    def fork(server, args, forks=8):
+        server.reset()
+        barrier = context.Barrier(forks)
+        results = context.Queue()
+
+        def run():
+            barrier.wait()
+            results.put(run_module(environment_info, server.module_args(**args)))
+
+        processes = [context.Process(target=run) for i in range(forks)]
+        for p in processes:
+            p.start()
+        found = [results.get(timeout=60) for p in processes]
+        for p in processes:
+            p.join()
+        return(found, server.stats())
+
+    with MockConfluentServer(org_size=5, latency=0.2) as server:
+        found, stats = fork(server, dict(ids=["env-000002"]))
+        assert all(r["env-000002"]["id"] == "env-000002" for r in found)
+        assert stats["requests"] == 8
+
+        found, stats = fork(server, dict(ids=["env-000002"], api_coalesce=True, api_stats=True))
+        assert all(r["env-000002"]["id"] == "env-000002" for r in found)
+        assert stats["requests"] == 1
+        assert sum(r["api_stats"]["coalesced"] for r in found) == 7
+        assert oct(flight.stat().st_mode & 0o777) == oct(0o700)
+
+        # Expired responses and idle locks are swept by the next request
+        old = time.time() - 3600
+        for entry in flight.iterdir():
+            os.utime(str(entry), (old, old))
+        found, stats = fork(server, dict(ids=["env-000001"], api_coalesce=True), forks=1)
+        assert sorted(e.suffix for e in flight.iterdir()) == [".json", ".lock"]
+
+        # A directory others can write to is not trusted
+        flight.chmod(0o777)
+        found, stats = fork(server, dict(ids=["env-000002"], api_coalesce=True))
+        assert stats["requests"] == 8
+        flight.chmod(0o700)
+
+        # With api_cache as well, misses and revalidations are coalesced
+        cache = dict(api_coalesce=True, api_cache=True, api_cache_dir=str(tmp_path / "cache"))
+        found, stats = fork(server, dict(cache, ids=["env-000003"]))
+        assert all(r["env-000003"]["id"] == "env-000003" for r in found)
+        assert stats["requests"] == 1
+
+        found, stats = fork(server, dict(cache, ids=["env-000003"], api_cache_ttl=0))
+        assert all(r["env-000003"]["id"] == "env-000003" for r in found)
+        assert stats["requests"] == 1
+        assert stats["statuses"] == {"304": 1}
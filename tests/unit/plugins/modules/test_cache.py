@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Response cache behaviour (api_cache) against the mock Confluent Cloud API,
+# which sends an ETag with every GET response and a Last-Modified with single
+# resources.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import time
+
+from ansible_collections.confluent.cloud.plugins.modules import environment, environment_info
+from ansible_collections.confluent.cloud.tests.unit.plugins.modules.conftest import measure
+
+
+def lookup(server, tmp_path, environment_id, **kwargs):
+    # Unchanged lookup of one environment by id, a single GET
+    args = dict(id=environment_id, name="environment-%d" % int(environment_id[4:]),
+                api_cache=True, api_cache_dir=str(tmp_path))
+    args.update(kwargs)
+    return(measure(server, environment, args))
+
+
+def entries(tmp_path):
+    return(sorted(n for n in os.listdir(str(tmp_path)) if n.endswith(".json")))
+
+
+def test_cache_hit(server, tmp_path):
+    args = dict(api_cache=True, api_cache_dir=str(tmp_path), api_page_size=10)
+    result, bench = measure(server, environment_info, args)
+    assert bench["requests"] == 3
+
+    cached_result, bench = measure(server, environment_info, args)
+    assert cached_result == result
+    assert bench["requests"] == 0
+
+
+def test_cache_ttl_and_etag_revalidation(server, tmp_path):
+    result, bench = lookup(server, tmp_path, "env-000001")
+    assert bench["statuses"] == {"200": 1}
+
+    # Expired entries are revalidated, the server answers 304 without a body
+    result, bench = lookup(server, tmp_path, "env-000001", api_cache_ttl=0)
+    assert result["changed"] is False
+    assert bench["statuses"] == {"304": 1}
+    assert bench["bytes_received"] == 0
+
+    # The revalidation restarted the TTL
+    result, bench = lookup(server, tmp_path, "env-000001")
+    assert bench["requests"] == 0
+
+    # A changed resource no longer matches the ETag, the lookup sees the
+    # new state.  The rename goes through a cache of its own so this one
+    # is not invalidated.
+    measure(server, environment, dict(id="env-000001", name="renamed"))
+    result, bench = lookup(server, tmp_path, "env-000001", name="renamed", api_cache_ttl=0)
+    assert result["changed"] is False
+    assert bench["statuses"] == {"200": 1}
+
+
+def test_cache_if_modified_since(server, tmp_path):
+    lookup(server, tmp_path, "env-000001")
+
+    # Without an ETag the entry is revalidated by its Last-Modified date
+    for name in entries(tmp_path):
+        path = os.path.join(str(tmp_path), name)
+        with open(path) as f:
+            entry = json.load(f)
+        assert entry["etag"] and entry["last_modified"]
+        entry["etag"] = None
+        with open(path, "w") as f:
+            json.dump(entry, f)
+
+    result, bench = lookup(server, tmp_path, "env-000001", api_cache_ttl=0)
+    assert result["changed"] is False
+    assert bench["statuses"] == {"304": 1}
+
+
+def test_cache_lru_eviction(server, tmp_path):
+    # Entry timestamps are compared, keep them apart on coarse clocks
+    for environment_id in ("env-000001", "env-000002", "env-000001", "env-000003"):
+        lookup(server, tmp_path, environment_id, api_cache_max_entries=2)
+        time.sleep(0.05)
+    assert len(entries(tmp_path)) == 2
+
+    # env-000002 was the least recently used when env-000003 came in
+    result, bench = lookup(server, tmp_path, "env-000001", api_cache_max_entries=2)
+    assert bench["requests"] == 0
+    result, bench = lookup(server, tmp_path, "env-000003", api_cache_max_entries=2)
+    assert bench["requests"] == 0
+    result, bench = lookup(server, tmp_path, "env-000002", api_cache_max_entries=2)
+    assert bench["requests"] == 1
+
+
+def test_cache_invalidated_by_writes(server, tmp_path):
+    args = dict(api_cache=True, api_cache_dir=str(tmp_path), api_page_size=10)
+    result, bench = measure(server, environment_info, dict(args, names=["renamed", "added"]))
+    assert bench["requests"] == 3
+    lookup(server, tmp_path, "env-000001")
+
+    # PATCH drops the cached collection and the resource
+    measure(server, environment, dict(args, id="env-000001", name="renamed"))
+    result, bench = measure(server, environment_info, dict(args, names=["renamed", "added"]))
+    assert list(k for k in result if k.startswith("env-")) == ["env-000001"]
+    assert bench["requests"] == 3
+    result, bench = lookup(server, tmp_path, "env-000001", name="renamed")
+    assert result["changed"] is False
+
+    # POST
+    result, bench = measure(server, environment, dict(args, name="added"))
+    assert result["changed"] is True
+    result, bench = measure(server, environment_info, dict(args, names=["renamed", "added"]))
+    assert sorted(k for k in result if k.startswith("env-")) == ["env-000001", "env-n00025"]
+    assert bench["requests"] == 3
+
+    # DELETE
+    measure(server, environment, dict(args, id="env-000001", state="absent"))
+    result, bench = measure(server, environment_info, dict(args, names=["renamed", "added"]))
+    assert sorted(k for k in result if k.startswith("env-")) == ["env-n00025"]
+    assert bench["requests"] == 3
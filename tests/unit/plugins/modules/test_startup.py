@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# AnsiballZ payload and import cost of the modules.  The payload is the set
+# of collection module_utils a module pulls in (AnsiballZ ships every
+# module_utils file imported anywhere in the module, function level imports
+# included), startup is measured in a fresh interpreter on top of
+# ansible.module_utils.basic, which every module loads anyway.  Run with -s
+# to see the measurements.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import ast
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from ansible_collections.confluent.cloud.plugins import modules
+
+MODULE_UTILS = "ansible_collections.confluent.cloud.plugins.module_utils"
+MODULE_UTILS_DIR = os.path.join(os.path.dirname(os.path.dirname(modules.__file__)), "module_utils")
+
+# Optional imports that must stay off the common path
+LAZY_IMPORTS = ("urllib.request", "ansible.module_utils.connection", "cProfile", "pstats", "tracemalloc")
+
+
+def module_utils_deps(path, seen=None):
+    # Collection module_utils imported by the file at path, recursively
+    seen = set() if seen is None else seen
+    with open(path) as f:
+        tree = ast.parse(f.read())
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module and node.module.startswith(MODULE_UTILS + "."):
+            name = node.module.rsplit(".", 1)[1]
+            if name not in seen:
+                seen.add(name)
+                module_utils_deps(os.path.join(MODULE_UTILS_DIR, name + ".py"), seen)
+    return(seen)
+
+
+def payload(name):
+    deps = module_utils_deps(os.path.join(os.path.dirname(modules.__file__), name + ".py"))
+    size = sum(os.path.getsize(os.path.join(MODULE_UTILS_DIR, d + ".py")) for d in deps)
+    print("\n%s payload %s" % (name, json.dumps(dict(module_utils=sorted(deps), bytes=size), sort_keys=True)))
+    return(deps)
+
+
+def startup(name):
+    # Import time and newly loaded modules in a fresh interpreter
+    code = "\n".join([
+        "import json, sys, time",
+        "import ansible.module_utils.basic",
+        "before = set(sys.modules)",
+        "start = time.time()",
+        "import ansible_collections.confluent.cloud.plugins.modules.%s" % name,
+        "print(json.dumps(dict(import_time=time.time() - start, loaded=sorted(set(sys.modules) - before))))",
+    ])
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    result = json.loads(subprocess.check_output([sys.executable, "-c", code], env=env))
+    print("\n%s startup %s" % (name, json.dumps(dict(import_time=result["import_time"], loaded=len(result["loaded"])))))
+    return(result)
+
+
+def test_ping_payload():
+    assert payload("ping") == set(["confluent_api"])
+
+
+@pytest.mark.parametrize("name", ["environment_info", "cluster_info", "service_account_info"])
+def test_info_payload(name):
+    assert payload(name) == set(["confluent_api", "confluent_cache"])
+
+
+def test_environment_payload():
+    assert payload("environment") == set(["confluent_api", "confluent_cache", "confluent_resource"])
+
+
+@pytest.mark.parametrize("name", ["ping", "environment_info", "environment"])
+def test_startup_skips_optional_imports(name):
+    loaded = startup(name)["loaded"]
+    for lazy in LAZY_IMPORTS:
+        assert lazy not in loaded
@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2022, Keith Resar <kresar@confluent.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Local stand-in for the Confluent Cloud API, used by the unit tests and
+# benchmarks.  The server runs in a child process so it neither competes for
+# the GIL nor shows up in the tracemalloc numbers of the code under test.  It
+# is driven and inspected through /_mock/* control endpoints, which are not
+# counted in its statistics.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import base64
+import calendar
+import hashlib
+import json
+import multiprocessing
+import random
+import threading
+import time
+import zlib
+from email.utils import formatdate, mktime_tz, parsedate_tz
+
+from ansible.module_utils.six.moves import http_client
+from ansible.module_utils.six.moves.BaseHTTPServer import BaseHTTPRequestHandler
+from ansible.module_utils.six.moves.urllib.parse import parse_qs, urlparse
+
+try:
+    from http.server import ThreadingHTTPServer
+except ImportError:
+    from ansible.module_utils.six.moves.BaseHTTPServer import HTTPServer
+    from ansible.module_utils.six.moves.socketserver import ThreadingMixIn
+
+    class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+
+def merge_patch(target, patch):
+    # RFC 7386 JSON merge patch, applied in place
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge_patch(target[key], value)
+        else:
+            target[key] = value
+
+
+class MockCollection:
+    # Resources of one list endpoint.  They live in a list so page tokens are
+    # plain offsets, deleted ones leave a None behind.  filters maps a query
+    # parameter to the field path it matches, e.g. environment ->
+    # spec.environment.id.
+
+    def __init__(self, path, api_version, kind, prefix, filters=None):
+        self.path = path
+        self.api_version = api_version
+        self.kind = kind
+        self.prefix = prefix
+        self.filters = filters or dict()
+        self.items = []
+        self.index = dict()
+
+    def add(self, resource, resource_id=None):
+        resource_id = resource_id or "%s-n%05d" % (self.prefix, len(self.items))
+        resource.update(
+            api_version=self.api_version,
+            kind=self.kind,
+            id=resource_id,
+            metadata=dict(
+                self="https://api.confluent.cloud%s/%s" % (self.path, resource_id),
+                resource_name="crn://confluent.cloud/organization=mock/%s=%s" % (self.kind.lower(), resource_id),
+                created_at="2022-01-01T00:00:00Z",
+                updated_at="2022-01-01T00:00:00Z",
+            ),
+        )
+        self.index[resource_id] = len(self.items)
+        self.items.append(resource)
+        return(resource)
+
+    def get(self, resource_id):
+        position = self.index.get(resource_id)
+        return(self.items[position] if position is not None else None)
+
+    def remove(self, resource_id):
+        self.items[self.index.pop(resource_id)] = None
+
+    def matches(self, resource, query):
+        for param, field in self.filters.items():
+            if param not in query:
+                continue
+            value = resource
+            for part in field.split("."):
+                value = value.get(part, dict()) if isinstance(value, dict) else dict()
+            if value != query[param][0]:
+                return(False)
+        return(True)
+
+
+class MockState:
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.random = random.Random(config["seed"])
+        self.faults = []
+
+        self.collections = dict((c.path, c) for c in (
+            MockCollection("/org/v2/environments", "org/v2", "Environment", "env"),
+            MockCollection("/cmk/v2/clusters", "cmk/v2", "Cluster", "lkc", dict(environment="spec.environment.id")),
+            MockCollection("/iam/v2/api-keys", "iam/v2", "ApiKey", "KEY", {
+                "spec.owner": "spec.owner.id",
+                "spec.resource": "spec.resource.id",
+            }),
+            MockCollection("/iam/v2/service-accounts", "iam/v2", "ServiceAccount", "sa"),
+        ))
+
+        # Every environment gets clusters_per_environment clusters, each of
+        # them api_keys_per_cluster keys owned by the first service account
+        environments = self.collections["/org/v2/environments"]
+        clusters = self.collections["/cmk/v2/clusters"]
+        api_keys = self.collections["/iam/v2/api-keys"]
+        accounts = self.collections["/iam/v2/service-accounts"]
+        for i in range(config["service_accounts"]):
+            accounts.add(dict(display_name="service-account-%d" % i, description=""), "sa-%06d" % i)
+        for i in range(config["org_size"]):
+            environments.add(dict(display_name="environment-%d" % i), "env-%06d" % i)
+            for j in range(config["clusters_per_environment"]):
+                cluster_id = "lkc-%06d" % len(clusters.items)
+                clusters.add(dict(
+                    spec=dict(
+                        display_name="cluster-%d" % j,
+                        availability="SINGLE_ZONE",
+                        cloud="AWS",
+                        region="us-west-2",
+                        config=dict(kind="Basic"),
+                        environment=dict(id="env-%06d" % i),
+                    ),
+                    status=dict(phase="PROVISIONED"),
+                ), cluster_id)
+                for k in range(config["api_keys_per_cluster"]):
+                    api_keys.add(dict(spec=dict(
+                        display_name="key-%d" % k,
+                        owner=dict(id="sa-000000"),
+                        resource=dict(id=cluster_id),
+                    )), "KEY%06d" % len(api_keys.items))
+        self.reset()
+
+    def reset(self):
+        self.stats = dict(requests=0, connections=0, bytes_sent=0, methods=dict(), statuses=dict(), paths=dict())
+
+    def record(self, method, path, status, size):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["bytes_sent"] += size
+            for key, value in (("methods", method), ("statuses", str(status)), ("paths", "%s %s" % (method, path))):
+                self.stats[key][value] = self.stats[key].get(value, 0) + 1
+
+    def fault(self, method):
+        # Injected faults are served first, then random ones at the configured rates
+        with self.lock:
+            for fault in self.faults:
+                if fault.get("method") in (None, method):
+                    self.faults.remove(fault)
+                    return(fault["status"], fault.get("retry_after"))
+        for status, rate in self.config["error_rates"].items():
+            if self.random.random() < rate:
+                return(int(status), self.config["retry_after"])
+        return(None, None)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    # Headers and body go out in separate writes, without this every
+    # response would stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, status, body=None, headers=None, record=True):
+        data = json.dumps(body).encode() if body is not None else b""
+        headers = dict(headers or {})
+        # Like the real API, larger bodies are gzip compressed when accepted
+        if record and self.server.state.config["compression"] and len(data) >= 1024 \
+                and "gzip" in self.headers.get("Accept-Encoding", ""):
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            data = compressor.compress(data) + compressor.flush()
+            headers["Content-Encoding"] = "gzip"
+        # Record before answering, the client may ask for the stats as soon
+        # as it has the response
+        if record:
+            self.server.state.record(self.command, urlparse(self.path).path, status, len(data))
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length) if length else b""
+        return(json.loads(data.decode()) if data else None)
+
+    def control(self):
+        state = self.server.state
+        action = urlparse(self.path).path.split("/")[-1]
+        body = self.read_body() or dict()
+        if action == "stats":
+            with state.lock:
+                return(self.send(200, state.stats, record=False))
+        if action == "reset":
+            with state.lock:
+                state.reset()
+            return(self.send(200, dict(), record=False))
+        if action == "inject":
+            with state.lock:
+                fault = dict(status=body["status"], retry_after=body.get("retry_after"), method=body.get("method"))
+                state.faults.extend([dict(fault) for i in range(body.get("count", 1))])
+            return(self.send(200, dict(), record=False))
+        self.send(404, dict(), record=False)
+
+    def authorized(self):
+        config = self.server.state.config
+        auth = "%s:%s" % (config["api_key"], config["api_secret"])
+        expected = "Basic %s" % base64.standard_b64encode(auth.encode()).decode()
+        return(self.headers.get("Authorization") == expected)
+
+    def handle_request(self):
+        url = urlparse(self.path)
+        if url.path.startswith("/_mock/"):
+            return(self.control())
+
+        # The handler lives as long as its connection, count it on the first
+        # API request so control connections are left out
+        state = self.server.state
+        if not getattr(self, "counted", False):
+            self.counted = True
+            with state.lock:
+                state.stats["connections"] += 1
+
+        body = self.read_body()
+        if state.config["latency"]:
+            time.sleep(state.config["latency"])
+
+        if not self.authorized():
+            return(self.send(401, dict(errors=[dict(status="401", detail="Unauthorized")])))
+
+        status, retry_after = state.fault(self.command)
+        if status:
+            headers = dict()
+            if retry_after is not None:
+                headers["Retry-After"] = str(retry_after)
+            return(self.send(status, dict(errors=[dict(status=str(status))]), headers=headers))
+
+        parts = url.path.rstrip("/").split("/")
+        collection = state.collections.get("/".join(parts[:4]))
+        if not collection or len(parts) > 5:
+            return(self.send(404, dict(errors=[dict(status="404")])))
+
+        if len(parts) == 4:
+            if self.command == "GET":
+                return(self.list_resources(collection, parse_qs(url.query)))
+            if self.command == "POST":
+                with state.lock:
+                    resource = collection.add(body)
+                return(self.send(201, resource))
+            return(self.send(405, dict()))
+
+        with state.lock:
+            resource = collection.get(parts[4])
+            if resource and self.command == "DELETE":
+                collection.remove(parts[4])
+            elif resource and self.command == "PATCH":
+                merge_patch(resource, body or dict())
+                resource["metadata"]["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            elif resource and self.command == "PUT":
+                resource.update(body or dict())
+                resource["metadata"]["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+        if not resource:
+            return(self.send(404, dict(errors=[dict(status="404")])))
+        if self.command == "DELETE":
+            return(self.send(204))
+        if self.command == "GET":
+            return(self.send_conditional(resource, resource["metadata"]["updated_at"]))
+        self.send(200, resource)
+
+    def send_conditional(self, body, updated_at=None):
+        # GET responses carry an ETag, single resources also a Last-Modified,
+        # and matching If-None-Match / If-Modified-Since get a 304
+        etag = '"%s"' % hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest()
+        headers = dict(ETag=etag)
+        modified = None
+        if updated_at:
+            modified = calendar.timegm(time.strptime(updated_at, "%Y-%m-%dT%H:%M:%SZ"))
+            headers["Last-Modified"] = formatdate(modified, usegmt=True)
+
+        if "If-None-Match" in self.headers:
+            if self.headers["If-None-Match"] == etag:
+                return(self.send(304, headers=headers))
+        elif modified is not None and "If-Modified-Since" in self.headers:
+            since = parsedate_tz(self.headers["If-Modified-Since"])
+            if since and mktime_tz(since) >= modified:
+                return(self.send(304, headers=headers))
+        self.send(200, body, headers=headers)
+
+    def list_resources(self, collection, query):
+        state = self.server.state
+        config = state.config
+        page_size = min(int(query.get("page_size", [config["default_page_size"]])[0]), config["max_page_size"])
+        offset = int(query.get("page_token", ["0"])[0])
+
+        page = []
+        with state.lock:
+            items = collection.items
+            while offset < len(items) and len(page) < page_size:
+                if items[offset] is not None and collection.matches(items[offset], query):
+                    page.append(items[offset])
+                offset += 1
+            more = any(items[i] is not None and collection.matches(items[i], query) for i in range(offset, len(items)))
+
+        path = urlparse(self.path).path
+        filters = "".join("&%s=%s" % (k, v[0]) for k, v in sorted(query.items()) if k in collection.filters)
+        metadata = dict(first="http://%s%s" % (self.headers["Host"], path))
+        if more:
+            metadata["next"] = "http://%s%s?page_size=%d&page_token=%d%s" % (self.headers["Host"], path, page_size, offset, filters)
+        self.send_conditional(dict(api_version=collection.api_version, kind="%sList" % collection.kind, metadata=metadata, data=page))
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = handle_request
+
+
+def serve(config, port_queue):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+    server.daemon_threads = True
+    server.state = MockState(config)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+class MockConfluentServer:
+    # Usage:
+    #
+    #   with MockConfluentServer(org_size=1000, latency=0.01) as server:
+    #       ... point api_endpoint at server.url ...
+    #       server.stats()["requests"]
+
+    def __init__(
+        self,
+        org_size=10,
+        clusters_per_environment=0,
+        api_keys_per_cluster=0,
+        service_accounts=0,
+        default_page_size=10,
+        max_page_size=100,
+        latency=0.0,
+        error_rates=None,
+        retry_after=None,
+        compression=True,
+        api_key="mock-key",
+        api_secret="mock-secret",
+        seed=0,
+    ):
+        self.config = dict(
+            org_size=org_size,
+            clusters_per_environment=clusters_per_environment,
+            api_keys_per_cluster=api_keys_per_cluster,
+            service_accounts=service_accounts,
+            default_page_size=default_page_size,
+            max_page_size=max_page_size,
+            latency=latency,
+            error_rates=dict(error_rates or {}),
+            retry_after=retry_after,
+            compression=compression,
+            api_key=api_key,
+            api_secret=api_secret,
+            seed=seed,
+        )
+        self.process = None
+        self.url = None
+
+    def start(self):
+        port_queue = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=serve, args=(self.config, port_queue))
+        self.process.daemon = True
+        self.process.start()
+        self.url = "http://127.0.0.1:%d" % port_queue.get(timeout=60)
+        return(self)
+
+    def stop(self):
+        if self.process:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def __enter__(self):
+        return(self.start())
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def control(self, action, payload=None):
+        url = urlparse(self.url)
+        conn = http_client.HTTPConnection(url.hostname, url.port, timeout=30)
+        try:
+            conn.request("POST", "/_mock/%s" % action, body=json.dumps(payload or {}), headers={"Content-Type": "application/json"})
+            return(json.loads(conn.getresponse().read().decode()))
+        finally:
+            conn.close()
+
+    def stats(self):
+        return(self.control("stats"))
+
+    def reset(self):
+        self.control("reset")
+
+    def inject(self, status, count=1, retry_after=None, method=None):
+        # Answer the next count API requests (of the given method) with status
+        self.control("inject", dict(status=status, count=count, retry_after=retry_after, method=method))
+
+    def module_args(self, **kwargs):
+        # Connection arguments for a module pointed at this server
+        args = dict(api_endpoint=self.url, api_key=self.config["api_key"], api_secret=self.config["api_secret"])
+        args.update(kwargs)
+        return(args)